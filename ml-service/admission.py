@@ -0,0 +1,107 @@
+"""
+Deadline-aware admission control.
+
+Bounds how many requests compute concurrently and how many may wait for a
+slot. When the wait queue is full, requests are rejected immediately instead
+of piling up behind the worker threads. Requests carrying a deadline that
+expires while queued are dropped, since the caller has already given up.
+"""
+import math
+import threading
+import time
+
+
+class QueueFull(Exception):
+    """Raised when the admission queue has no room left."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline expires before it gets a slot."""
+
+
+def parse_deadline(header_value, now=None):
+    """Convert an X-Deadline-Ms header (remaining budget in ms) to a monotonic deadline.
+
+    Returns None when the header is absent, malformed or not finite.
+    """
+    if not header_value:
+        return None
+    try:
+        budget_ms = float(header_value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(budget_ms):
+        return None
+    now = time.monotonic() if now is None else now
+    return now + budget_ms / 1000.0
+
+
+def remaining_ms(deadline):
+    """Milliseconds left before deadline (None if there is no deadline)."""
+    if deadline is None:
+        return None
+    return (deadline - time.monotonic()) * 1000.0
+
+
+class AdmissionController:
+    """Semaphore-bounded execution slots with a bounded, deadline-aware wait queue."""
+
+    def __init__(self, max_concurrent=2, max_queue=8, queue_timeout_ms=10000):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_ms = queue_timeout_ms
+        self._slots = threading.Semaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queued = 0
+        self._rejected = 0
+        self._expired = 0
+
+    def acquire(self, deadline=None):
+        """Take an execution slot, waiting at most until the deadline.
+
+        Raises QueueFull or DeadlineExceeded; on success the caller must
+        call release().
+        """
+        if deadline is not None and deadline <= time.monotonic():
+            with self._lock:
+                self._expired += 1
+            raise DeadlineExceeded()
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self._queued >= self.max_queue:
+                    self._rejected += 1
+                    raise QueueFull()
+                self._queued += 1
+
+            timeout = self.queue_timeout_ms / 1000.0
+            if deadline is not None:
+                timeout = min(timeout, max(deadline - time.monotonic(), 0.0))
+            acquired = self._slots.acquire(timeout=timeout)
+
+            with self._lock:
+                self._queued -= 1
+                if not acquired:
+                    self._expired += 1
+            if not acquired:
+                raise DeadlineExceeded()
+
+        with self._lock:
+            self._in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "rejected": self._rejected,
+                "expired": self._expired,
+            }
@@ -4,9 +4,25 @@ Flask API serving LightGBM predictions (or rule-based fallback).
 Deployed to Google Cloud Run.
 """
 import os
+import json
+import functools
+import threading
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
+from admission import AdmissionController, QueueFull, DeadlineExceeded, parse_deadline, remaining_ms
+import profiling
+from explain_queue import ExplanationQueue
 from scoring.rule_based import predict_foot_risk, _generate_recommendations, RISK_LABELS as ML_RISK_LABELS
+from scoring.surrogate import (
+    load_surrogate, score_surrogate, score_surrogate_batch, SURROGATE_VERSION, SURROGATE_FILENAME
+)
+from scoring.early_exit import (
+    StagedBooster, load_early_exit, predict_regression, predict_classes, EARLY_EXIT_FILENAME
+)
+from scoring.cohort import (
+    summarize_cohort, iter_record_chunks, iter_csv_chunks,
+    DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE
+)
 
 app = Flask(__name__)
 
@@ -27,14 +43,62 @@ RISK_LEVEL_NAMES = ["low", "moderate", "high"]
 _regressor = None
 _classifier = None
 _explainer = None
+_explanations = None
+_surrogate = None
+_early_exit = None
+_manifest = None
 _model_loaded = False
 
 MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
 
+# "lightgbm" serves the boosters, "surrogate" the distilled additive model
+MODEL_MODE = os.environ.get("MODEL_MODE", "lightgbm")
+
+# LightGBM inference: "full" evaluates every tree, "fast" only the first
+# FAST_TREES, "early_exit" stops per row once the remaining trees cannot
+# move the score by more than EARLY_EXIT_TOLERANCE points or flip the class.
+# Early exit only pays off on batches (cohorts): its per-stage booster calls
+# make a single row slower than "full", so /predict serves it as "full",
+# which keeps the accuracy guarantee the caller asked for.
+# Bounds are the calibrated ones from training unless EARLY_EXIT_BOUNDS=exact;
+# exact bounds are a worst-case reference and too loose for these 300-tree
+# models to exit at all (the regressor always runs every tree).
+INFERENCE_MODES = ("full", "fast", "early_exit")
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "full")
+EARLY_EXIT_TOLERANCE = float(os.environ.get("EARLY_EXIT_TOLERANCE", 1.0))
+EARLY_EXIT_BOUNDS = os.environ.get("EARLY_EXIT_BOUNDS", "empirical")
+FAST_TREES = os.environ.get("FAST_TREES")
+
+# Cohort files may only be read from this directory (unset = inline batches only)
+COHORT_DATA_DIR = os.environ.get("COHORT_DATA_DIR")
+
+# --- Admission control ---
+# Remaining-budget thresholds for graceful degradation: below SHAP_MIN the
+# explanation is skipped, below MODEL_MIN the surrogate (or, without one,
+# the rule-based scorer) is used.
+DEADLINE_SHAP_MIN_MS = float(os.environ.get("DEADLINE_SHAP_MIN_MS", 250))
+DEADLINE_MODEL_MIN_MS = float(os.environ.get("DEADLINE_MODEL_MIN_MS", 50))
+
+_admission = AdmissionController(
+    max_concurrent=int(os.environ.get("ADMISSION_MAX_CONCURRENT", 2)),
+    max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", 8)),
+    queue_timeout_ms=float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_MS", 10000)),
+)
+
+# --- Explanations ---
+# "sync" computes SHAP inline, "deferred" returns an explanation_id and
+# computes SHAP in the background; callers may override per request.
+EXPLAIN_MODES = ("sync", "deferred", "none")
+EXPLAIN_MODE = os.environ.get("EXPLAIN_MODE", "sync")
+EXPLAIN_MAX_WAIT_SECONDS = 10
+# Long-polls hold a server thread outside admission control, so only this
+# many may block at once; further polls answer immediately with the status.
+_explain_pollers = threading.BoundedSemaphore(int(os.environ.get("EXPLAIN_MAX_POLLERS", 2)))
+
 
 def _load_models():
     """Try to load LightGBM models and SHAP explainer at startup."""
-    global _regressor, _classifier, _explainer, _model_loaded
+    global _regressor, _classifier, _explainer, _explanations, _surrogate, _early_exit, _manifest, _model_loaded
 
     reg_path = os.path.join(MODELS_DIR, "foot_risk_regressor.pkl")
     clf_path = os.path.join(MODELS_DIR, "foot_risk_classifier.pkl")
@@ -46,18 +110,92 @@ def _load_models():
         _classifier = joblib.load(clf_path)
         if os.path.exists(shap_path):
             _explainer = joblib.load(shap_path)
+            _explanations = ExplanationQueue(
+                _explainer.shap_values, _shap_dict,
+                workers=int(os.environ.get("EXPLAIN_WORKERS", 1)),
+                max_batch=int(os.environ.get("EXPLAIN_MAX_BATCH", 64)),
+                max_pending=int(os.environ.get("EXPLAIN_MAX_PENDING", 1000)),
+                max_results=int(os.environ.get("EXPLAIN_MAX_RESULTS", 10000)),
+                ttl_seconds=float(os.environ.get("EXPLAIN_TTL_SECONDS", 600)),
+            )
+        _early_exit = _load_early_exit()
+        manifest_path = os.path.join(MODELS_DIR, "training_manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                _manifest = json.load(f)
+            if _manifest["mode"] == "incremental" and INFERENCE_MODE == "fast":
+                app.logger.warning("'fast' inference ignores the trees added by incremental updates")
         _model_loaded = True
         app.logger.info("LightGBM models loaded successfully")
     else:
         app.logger.info("No LightGBM models found, using rule-based fallback")
 
+    surrogate_path = os.path.join(MODELS_DIR, SURROGATE_FILENAME)
+    if os.path.exists(surrogate_path):
+        _surrogate = load_surrogate(surrogate_path)
+        app.logger.info("Surrogate model loaded successfully")
+
+
+def _load_early_exit():
+    """Build staged boosters for early-exit inference, with calibrated bounds when they fit."""
+    config = {}
+    path = os.path.join(MODELS_DIR, EARLY_EXIT_FILENAME)
+    if os.path.exists(path):
+        config = load_early_exit(path)
+
+    calibrated = (
+        config.get("regressor", {}).get("n_iter") == _regressor.booster_.current_iteration()
+        and config.get("classifier", {}).get("n_iter") == _classifier.booster_.current_iteration()
+    )
+    stages = config.get("stages") if calibrated else None
+    staged_reg = StagedBooster(_regressor.booster_, stages)
+    staged_clf = StagedBooster(_classifier.booster_, stages)
+    reg_bounds, clf_bounds = staged_reg.exact_bounds(), staged_clf.exact_bounds()
+
+    if EARLY_EXIT_BOUNDS == "empirical" and calibrated:
+        reg_bounds, clf_bounds = config["regressor"]["bounds"], config["classifier"]["bounds"]
+    elif EARLY_EXIT_BOUNDS == "empirical":
+        app.logger.warning("Early-exit calibration missing or stale, using exact bounds")
 
-def _predict_lightgbm(data, lang="fr"):
-    """Run prediction through LightGBM models with SHAP explainability."""
-    import pandas as pd
+    return {
+        "regressor": (staged_reg, reg_bounds),
+        "classifier": (staged_clf, clf_bounds),
+        "fast_trees": int(FAST_TREES or config.get("fast_trees", staged_reg.n_iter // 2)),
+    }
+
+
+def _score_lightgbm(X, inference="full", **predict_kwargs):
+    """Risk scores (raw) and level indices from the boosters in the given inference mode."""
+    if inference == "fast":
+        k = _early_exit["fast_trees"]
+        raw = _regressor.predict(X, num_iteration=k, **predict_kwargs)
+        levels = _classifier.predict(X, num_iteration=k, **predict_kwargs)
+    elif inference == "early_exit":
+        staged_reg, reg_bounds = _early_exit["regressor"]
+        staged_clf, clf_bounds = _early_exit["classifier"]
+        raw, _ = predict_regression(staged_reg, reg_bounds, X, EARLY_EXIT_TOLERANCE, **predict_kwargs)
+        margins, _ = predict_classes(staged_clf, clf_bounds, X, **predict_kwargs)
+        levels = margins.argmax(axis=1)
+    else:
+        raw = _regressor.predict(X, **predict_kwargs)
+        levels = _classifier.predict(X, **predict_kwargs)
+    return raw, levels
 
-    # Build feature vector in correct order
-    features = {
+
+def _score_surrogate(X, **predict_kwargs):
+    """Risk scores (raw) and level indices from the surrogate; LightGBM kwargs are ignored."""
+    raw, margins = score_surrogate_batch(_surrogate, X)
+    return raw, margins.argmax(axis=1)
+
+
+def _shap_dict(sv_row):
+    """Map one row of SHAP values to {feature: rounded value}."""
+    return {fname: round(float(sv_row[i]), 3) for i, fname in enumerate(FEATURE_NAMES)}
+
+
+def _build_features(data):
+    """Build the feature vector in model order."""
+    return {
         "hba1c": data["hba1c"],
         "crp": data["crp"],
         "creatinine": data["creatinine"],
@@ -71,34 +209,45 @@ def _predict_lightgbm(data, lang="fr"):
         "has_pvd": int(data.get("has_pvd", False)),
     }
 
-    X = pd.DataFrame([features])
 
-    # Regressor: continuous risk score
-    raw_score = _regressor.predict(X)[0]
-    risk_score = int(np.clip(np.round(raw_score), 0, 100))
+def _predict_lightgbm(data, lang="fr", explain="sync", inference="full"):
+    """Run prediction through LightGBM models with SHAP explainability.
+
+    explain: "sync" computes SHAP inline, "deferred" queues it and returns an
+    explanation_id, "none" skips it. inference: see INFERENCE_MODES.
+    """
+    import pandas as pd
 
-    # Classifier: risk level
-    class_idx = _classifier.predict(X)[0]
+    features = _build_features(data)
+    X = pd.DataFrame([features])
+
+    # Regressor: continuous risk score; classifier: risk level
+    raw_scores, class_indices = _score_lightgbm(X, inference)
+    risk_score = int(np.clip(np.round(raw_scores[0]), 0, 100))
+    class_idx = int(class_indices[0])
     risk_level = RISK_LEVEL_NAMES[class_idx]
     labels = ML_RISK_LABELS.get(lang, ML_RISK_LABELS["fr"])
     risk_label = labels[risk_level]
 
     # SHAP values for explainability
     shap_values = None
-    if _explainer is not None:
+    explanation_id = None
+    if explain == "sync" and _explainer is not None:
         try:
             sv = _explainer.shap_values(X)
-            shap_dict = {}
-            for i, fname in enumerate(FEATURE_NAMES):
-                shap_dict[fname] = round(float(sv[0][i]), 3)
-            shap_values = shap_dict
+            shap_values = _shap_dict(sv[0])
         except Exception as e:
             app.logger.warning(f"SHAP computation failed: {e}")
+    elif explain == "deferred":
+        if _explanations is not None:
+            explanation_id = _explanations.submit(features)
+        if explanation_id is None:
+            app.logger.warning("Explanation queue full or SHAP unavailable, skipping SHAP")
 
     # Recommendations (reuse the clinically-validated rule-based logic)
     recommendations = _generate_recommendations(data, risk_score, risk_level, lang)
 
-    return {
+    result = {
         "risk_score": risk_score,
         "risk_level": risk_level,
         "risk_label": risk_label,
@@ -107,9 +256,89 @@ def _predict_lightgbm(data, lang="fr"):
         "model_version": "lightgbm_v1",
         "fallback": False,
     }
+    if explanation_id is not None:
+        result["explanation_id"] = explanation_id
+    elif explain == "deferred":
+        # Tells callers not to wait for an explanation that was never queued
+        result["explanation"] = "unavailable"
+    if inference != "full":
+        result["inference"] = inference
+    return result
+
+
+def _predict_surrogate(data, lang="fr"):
+    """Run prediction through the distilled surrogate (no SHAP)."""
+    raw_score, class_idx = score_surrogate(_surrogate, _build_features(data))
+    risk_score = int(np.clip(np.round(raw_score), 0, 100))
+    risk_level = RISK_LEVEL_NAMES[class_idx]
+    labels = ML_RISK_LABELS.get(lang, ML_RISK_LABELS["fr"])
+
+    return {
+        "risk_score": risk_score,
+        "risk_level": risk_level,
+        "risk_label": labels[risk_level],
+        "shap_values": None,
+        "recommendations": _generate_recommendations(data, risk_score, risk_level, lang),
+        "model_version": SURROGATE_VERSION,
+        "fallback": False,
+    }
+
+
+def _admitted(view):
+    """Run the view under admission control, honouring the caller's X-Deadline-Ms.
+
+    Rejects with 503 when the queue is full or the deadline expires while
+    queued; the deadline is exposed to the view as g.deadline.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        deadline = parse_deadline(request.headers.get("X-Deadline-Ms"))
+        try:
+            _admission.acquire(deadline)
+        except QueueFull:
+            app.logger.warning("Admission queue full, rejecting request")
+            return jsonify({"error": "Service surcharge, reessayer plus tard"}), 503, {"Retry-After": "1"}
+        except DeadlineExceeded:
+            app.logger.warning("Request deadline expired while queued, dropping")
+            return jsonify({"error": "Delai de la requete depasse"}), 503
+        try:
+            g.deadline = deadline
+            return view(*args, **kwargs)
+        finally:
+            _admission.release()
+    return wrapper
+
+
+def _degradation():
+    """Pick the degradation step for the time left: None, "shap_skipped" or "rule_based"."""
+    left = remaining_ms(g.get("deadline"))
+    if left is None or left >= DEADLINE_SHAP_MIN_MS:
+        return None
+    if left >= DEADLINE_MODEL_MIN_MS:
+        return "shap_skipped"
+    return "rule_based"
+
+
+def _select_model():
+    """Pick the scorer for this request and the degradation to report.
+
+    LightGBM if loaded (and time allows), then the surrogate, then rule-based;
+    MODEL_MODE=surrogate serves the surrogate outright. Returns (model, degraded)
+    with model one of "lightgbm", "surrogate", "rule_based".
+    """
+    degraded = _degradation()
+    if _surrogate is not None and (
+        MODEL_MODE == "surrogate" or not _model_loaded or degraded == "rule_based"
+    ):
+        serving_lightgbm = _model_loaded and MODEL_MODE != "surrogate"
+        return "surrogate", "surrogate" if serving_lightgbm and degraded == "rule_based" else None
+    if _model_loaded and degraded != "rule_based":
+        return "lightgbm", degraded
+    return "rule_based", degraded
 
 
 @app.route("/predict", methods=["POST"])
+@_admitted
 def predict():
     data = request.get_json(silent=True)
     if not data:
@@ -132,32 +361,155 @@ def predict():
         data[bool_field] = bool(data.get(bool_field, False))
 
     lang = data.pop("lang", "fr")
-
-    # Use LightGBM if available, otherwise rule-based
-    if _model_loaded:
+    explain = data.pop("explain", EXPLAIN_MODE)
+    if explain not in EXPLAIN_MODES:
+        return jsonify({"error": f"Valeur invalide pour explain: {explain}"}), 400
+    inference = data.pop("inference", INFERENCE_MODE)
+    if inference not in INFERENCE_MODES:
+        return jsonify({"error": f"Valeur invalide pour inference: {inference}"}), 400
+    if inference == "early_exit":
+        # Staged evaluation is slower than the full ensemble for one row, and
+        # "full" trivially meets the early-exit accuracy bound
+        inference = "full"
+
+    model, degraded = _select_model()
+    if model == "surrogate":
+        result = _predict_surrogate(data, lang)
+    elif model == "lightgbm":
         try:
-            result = _predict_lightgbm(data, lang)
+            # Deferred SHAP costs the request nothing, so only sync SHAP is degraded
+            if degraded == "shap_skipped" and explain == "sync":
+                explain = "none"
+            result = _predict_lightgbm(data, lang, explain, inference)
         except Exception as e:
             app.logger.error(f"LightGBM prediction failed: {e}, falling back to rule-based")
             result = predict_foot_risk(data, lang)
     else:
         result = predict_foot_risk(data, lang)
 
+    if degraded and _model_loaded:
+        result["degraded"] = degraded
+
     return jsonify(result)
 
 
+def _resolve_cohort_path(path):
+    """Resolve a cohort file path, refusing anything outside COHORT_DATA_DIR."""
+    if not COHORT_DATA_DIR:
+        return None
+    base = os.path.realpath(COHORT_DATA_DIR)
+    resolved = os.path.realpath(os.path.join(base, path))
+    if os.path.commonpath([base, resolved]) != base or not os.path.isfile(resolved):
+        return None
+    return resolved
+
+
+@app.route("/cohort/summary", methods=["POST"])
+@_admitted
+def cohort_summary():
+    """Aggregate risk statistics for a cohort without returning per-patient rows.
+
+    Body: {"patients": [...]} for an inline batch, or {"path": "cohort.csv"}
+    for a CSV file under COHORT_DATA_DIR. Optional: include_shap, chunk_size,
+    inference.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Request body must be JSON"}), 400
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+
+    try:
+        chunk_size = int(data.get("chunk_size", DEFAULT_CHUNK_SIZE))
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Valeur invalide: {e}"}), 400
+    chunk_size = min(max(chunk_size, 1), MAX_CHUNK_SIZE)
+
+    inference = data.get("inference", INFERENCE_MODE)
+    if inference not in INFERENCE_MODES:
+        return jsonify({"error": f"Valeur invalide pour inference: {inference}"}), 400
+
+    if isinstance(data.get("patients"), list):
+        chunks = iter_record_chunks(data["patients"], chunk_size)
+    elif isinstance(data.get("path"), str):
+        path = _resolve_cohort_path(data["path"])
+        if path is None:
+            return jsonify({"error": "Fichier de cohorte introuvable ou non autorise"}), 400
+        chunks = iter_csv_chunks(path, chunk_size)
+    else:
+        return jsonify({"error": "Fournir 'patients' (liste) ou 'path'"}), 400
+
+    # Same model choice and degradation order as /predict
+    model, degraded = _select_model()
+    try:
+        if model == "lightgbm":
+            score_fn = functools.partial(_score_lightgbm, inference=inference)
+            explainer = _explainer if data.get("include_shap", True) and degraded is None else None
+            summary = summarize_cohort(chunks, score_fn, explainer)
+        elif model == "surrogate":
+            summary = summarize_cohort(chunks, _score_surrogate)
+        else:
+            summary = summarize_cohort(chunks)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    summary["model_version"] = {
+        "lightgbm": "lightgbm_v1", "surrogate": SURROGATE_VERSION, "rule_based": "rule_based_v1",
+    }[model]
+    if model == "lightgbm" and inference != "full":
+        summary["inference"] = inference
+    if degraded and _model_loaded:
+        summary["degraded"] = degraded
+    return jsonify(summary)
+
+
+@app.route("/explanations/<explanation_id>", methods=["GET"])
+def get_explanation(explanation_id):
+    """Fetch deferred SHAP values; ?wait=N long-polls up to N seconds while pending.
+
+    When EXPLAIN_MAX_POLLERS long-polls are already waiting, returns the
+    current status (possibly "pending") without waiting.
+    """
+    if _explanations is None:
+        return jsonify({"error": "Explications SHAP indisponibles"}), 404
+    try:
+        wait = float(request.args.get("wait", 0))
+    except ValueError:
+        return jsonify({"error": "Valeur invalide pour wait"}), 400
+    wait = min(max(wait, 0.0), EXPLAIN_MAX_WAIT_SECONDS)
+
+    if wait > 0 and _explain_pollers.acquire(blocking=False):
+        try:
+            entry = _explanations.get(explanation_id, wait)
+        finally:
+            _explain_pollers.release()
+    else:
+        entry = _explanations.get(explanation_id)
+    if entry is None:
+        return jsonify({"error": "Explication introuvable ou expiree"}), 404
+    return jsonify({"explanation_id": explanation_id, **entry})
+
+
 @app.route("/health", methods=["GET"])
 def health():
-    model_name = "lightgbm_v1" if _model_loaded else "rule_based_v1"
+    if MODEL_MODE == "surrogate" and _surrogate is not None:
+        model_name = SURROGATE_VERSION
+    else:
+        model_name = "lightgbm_v1" if _model_loaded else "rule_based_v1"
     return jsonify({
         "status": "ok",
         "model": model_name,
-        "shap_available": _explainer is not None
+        "shap_available": _explainer is not None,
+        "surrogate_available": _surrogate is not None,
+        "artifact_version": _manifest["version"] if _manifest else None,
+        "admission": _admission.stats(),
+        "explanations": _explanations.stats() if _explanations is not None else None,
     })
 
 
 # Load models on startup
 _load_models()
+profiling.init_app(app)
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
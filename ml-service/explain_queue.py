@@ -0,0 +1,124 @@
+"""
+Deferred SHAP explanations.
+
+Predictions are returned immediately with an explanation ID; SHAP values are
+computed by a small background worker pool that batches whatever jobs are
+pending into a single explainer call. Results live in a bounded TTL store
+and can be fetched (or long-polled) by ID.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from queue import Queue, Empty, Full
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class ExplanationQueue:
+    """Background SHAP worker pool with a bounded TTL result store.
+
+    explain_batch receives a DataFrame and returns one row of SHAP values per
+    input row; to_result turns a row into the JSON-ready shap_values dict.
+    """
+
+    def __init__(self, explain_batch, to_result, workers=1, max_batch=64,
+                 max_pending=1000, max_results=10000, ttl_seconds=600):
+        self._explain_batch = explain_batch
+        self._to_result = to_result
+        self.max_batch = max_batch
+        self.max_results = max_results
+        self.ttl_seconds = ttl_seconds
+        self._jobs = Queue(maxsize=max_pending)
+        self._results = OrderedDict()
+        self._cond = threading.Condition()
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"shap-worker-{i}", daemon=True).start()
+
+    def submit(self, features):
+        """Queue one feature row; returns its explanation ID, or None if the queue
+        (or the result store, with every entry still pending) is full."""
+        job_id = uuid.uuid4().hex
+        with self._cond:
+            if not self._purge():
+                return None
+            self._results[job_id] = {
+                "status": "pending",
+                "shap_values": None,
+                "expires_at": time.monotonic() + self.ttl_seconds,
+            }
+        try:
+            self._jobs.put_nowait((job_id, features))
+        except Full:
+            with self._cond:
+                self._results.pop(job_id, None)
+            return None
+        return job_id
+
+    def get(self, job_id, wait=0.0):
+        """Return the stored entry for job_id, waiting up to `wait` seconds while pending.
+
+        Returns None for unknown or expired IDs.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._results.get(job_id, {}).get("status") != "pending",
+                timeout=wait,
+            )
+            entry = self._results.get(job_id)
+            if entry is None or entry["expires_at"] < time.monotonic():
+                return None
+            return {"status": entry["status"], "shap_values": entry["shap_values"]}
+
+    def stats(self):
+        with self._cond:
+            return {"pending": self._jobs.qsize(), "stored": len(self._results)}
+
+    def _purge(self):
+        """Drop expired entries, then the oldest finished one if the store is full.
+
+        Pending jobs are never evicted for space; returns False if the store
+        is still full.
+        """
+        # Entries share one TTL, so insertion order is expiry order.
+        now = time.monotonic()
+        while self._results and next(iter(self._results.values()))["expires_at"] < now:
+            self._results.popitem(last=False)
+        if len(self._results) < self.max_results:
+            return True
+        finished = next(
+            (job_id for job_id, entry in self._results.items() if entry["status"] != "pending"), None
+        )
+        if finished is None:
+            return False
+        del self._results[finished]
+        return True
+
+    def _work(self):
+        while True:
+            batch = [self._jobs.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._jobs.get_nowait())
+                except Empty:
+                    break
+
+            ids = [job_id for job_id, _ in batch]
+            X = pd.DataFrame([features for _, features in batch])
+            try:
+                sv = self._explain_batch(X)
+                updates = [("done", self._to_result(row)) for row in sv]
+            except Exception:
+                logger.exception("Deferred SHAP batch failed")
+                updates = [("failed", None)] * len(ids)
+
+            with self._cond:
+                for job_id, (status, shap_values) in zip(ids, updates):
+                    entry = self._results.get(job_id)
+                    if entry is not None:
+                        entry["status"] = status
+                        entry["shap_values"] = shap_values
+                self._cond.notify_all()
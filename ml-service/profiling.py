@@ -0,0 +1,264 @@
+"""
+On-demand request profiling.
+
+Opt-in and access-controlled: nothing is registered on the app unless
+PROFILE_TOKEN is set, so disabled profiling costs nothing per request.
+When enabled, a request is profiled if it sends X-Profile (cprofile|sample)
+with a matching X-Profile-Token, or is picked by PROFILE_SAMPLE_RATE.
+Profiles go to a bounded, rotating directory (PROFILE_DIR, PROFILE_MAX_FILES)
+and are listed under /debug/profiles. A continuous sampling window across
+all threads produces a folded stack dump (flamegraph.pl / speedscope ready).
+"""
+import cProfile
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import request, jsonify, send_from_directory, g
+
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "/tmp/foot-risk-profiles")
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 50))
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DEFAULT_MODE = os.environ.get("PROFILE_DEFAULT_MODE", "sample")
+SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", 5))
+MAX_WINDOW_SECONDS = 60
+
+MODES = ("cprofile", "sample")
+_PROFILE_NAME = re.compile(r"^[\w.\-]+\.(prof|folded)$")
+
+_window_lock = threading.Lock()
+
+# Leaf frames of threads parked waiting for work (queue workers, idle
+# server threads); skipped in all-thread samples so they don't pad the dump.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "wait_for"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+}
+
+
+class StackSampler:
+    """Low-overhead wall-clock sampler collecting folded stacks.
+
+    Samples one thread (thread_id) or every thread except its own, those in
+    exclude and idle ones, every interval_ms, from a background thread; the
+    profiled code is not traced.
+    """
+
+    def __init__(self, thread_id=None, interval_ms=SAMPLE_INTERVAL_MS, exclude=()):
+        self.thread_id = thread_id
+        self.exclude = set(exclude)
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        # Sample on start and on stop too, so calls shorter than one
+        # interval still produce a profile
+        skip = self.exclude | {threading.get_ident()}
+        self._sample(skip)
+        while not self._stop.wait(self.interval):
+            self._sample(skip)
+        self._sample(skip)
+
+    def _sample(self, skip):
+        frames = sys._current_frames()
+        if self.thread_id is not None:
+            frame = frames.get(self.thread_id)
+            if frame is not None:
+                self.stacks[_fold(frame)] += 1
+        else:
+            for tid, frame in frames.items():
+                if tid not in skip and not _is_idle(frame):
+                    self.stacks[_fold(frame)] += 1
+
+    def folded(self):
+        """Stack dump in 'outer;...;inner count' lines."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _is_idle(frame):
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+def _fold(frame):
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def _authorized():
+    token = request.headers.get("X-Profile-Token", "")
+    return hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def _write_profile(name, writer):
+    """Write a profile file, then drop the oldest ones beyond PROFILE_MAX_FILES."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, name)
+    writer(path)
+
+    def age(f):
+        # Names start with a second-resolution timestamp; mtime orders within it
+        try:
+            mtime = os.stat(os.path.join(PROFILE_DIR, f)).st_mtime_ns
+        except OSError:
+            mtime = 0
+        return f.split("-", 1)[0], mtime
+
+    files = sorted((f for f in os.listdir(PROFILE_DIR) if _PROFILE_NAME.match(f)), key=age)
+    for old in files[:-PROFILE_MAX_FILES]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, old))
+        except OSError:
+            pass
+    return name
+
+
+def _write_folded(name, folded):
+    def write(path):
+        with open(path, "w") as f:
+            f.write(folded)
+    return _write_profile(name, write)
+
+
+def _profile_name(label, ext):
+    safe = re.sub(r"[^\w\-]", "_", label.strip("/")) or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}-{safe}.{ext}"
+
+
+def _start_request_profile():
+    mode = None
+    requested = request.headers.get("X-Profile")
+    if requested:
+        if requested in MODES and _authorized():
+            mode = requested
+    elif PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        mode = PROFILE_DEFAULT_MODE
+    if mode is None:
+        return
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request on this interpreter is already being cProfiled
+            return
+    else:
+        profiler = StackSampler(thread_id=threading.get_ident()).start()
+    g.profiler = (mode, profiler, time.perf_counter())
+
+
+def _finish_request_profile(response):
+    state = g.pop("profiler", None)
+    if state is None:
+        return response
+    mode, profiler, started = state
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if mode == "cprofile":
+        profiler.disable()
+        name = _write_profile(_profile_name(request.path, "prof"), profiler.dump_stats)
+    else:
+        profiler.stop()
+        if not profiler.stacks:
+            return response
+        name = _write_folded(_profile_name(request.path, "folded"), profiler.folded())
+
+    response.headers["X-Profile-Id"] = name
+    response.headers["X-Profile-Elapsed-Ms"] = f"{elapsed_ms:.1f}"
+    return response
+
+
+def _abort_request_profile(exc):
+    """Stop a profiler left running when the view raised before after_request."""
+    state = g.pop("profiler", None)
+    if state is None:
+        return
+    mode, profiler, _ = state
+    if mode == "cprofile":
+        profiler.disable()
+    else:
+        profiler.stop()
+
+
+def list_profiles():
+    if not _authorized():
+        return jsonify({"error": "Non autorise"}), 403
+    if not os.path.isdir(PROFILE_DIR):
+        return jsonify({"profiles": []})
+    profiles = []
+    for f in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if _PROFILE_NAME.match(f):
+            st = os.stat(os.path.join(PROFILE_DIR, f))
+            profiles.append({"name": f, "size_bytes": st.st_size, "created_at": int(st.st_mtime)})
+    return jsonify({"profiles": profiles})
+
+
+def get_profile(name):
+    if not _authorized():
+        return jsonify({"error": "Non autorise"}), 403
+    if not _PROFILE_NAME.match(name):
+        return jsonify({"error": "Profil introuvable"}), 404
+    return send_from_directory(PROFILE_DIR, name, as_attachment=True)
+
+
+def sample_window():
+    """Sample every thread for ?seconds=N (max 60) and store a folded stack dump."""
+    if not _authorized():
+        return jsonify({"error": "Non autorise"}), 403
+    try:
+        seconds = float(request.args.get("seconds", 10))
+    except ValueError:
+        return jsonify({"error": "Valeur invalide pour seconds"}), 400
+    seconds = min(max(seconds, 0.1), MAX_WINDOW_SECONDS)
+
+    if not _window_lock.acquire(blocking=False):
+        return jsonify({"error": "Une fenetre d'echantillonnage est deja en cours"}), 409
+    try:
+        sampler = StackSampler(exclude={threading.get_ident()}).start()
+        time.sleep(seconds)
+        folded = sampler.stop().folded()
+    finally:
+        _window_lock.release()
+
+    name = _write_folded(_profile_name("window", "folded"), folded) if folded else None
+    return jsonify({"name": name, "seconds": seconds, "samples": sum(sampler.stacks.values())})
+
+
+def init_app(app):
+    """Register profiling hooks and endpoints; a no-op unless PROFILE_TOKEN is set."""
+    if not PROFILE_TOKEN:
+        return False
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
+    app.teardown_request(_abort_request_profile)
+    app.add_url_rule("/debug/profiles", "list_profiles", list_profiles, methods=["GET"])
+    app.add_url_rule("/debug/profiles/<name>", "get_profile", get_profile, methods=["GET"])
+    app.add_url_rule("/debug/profiles/window", "sample_window", sample_window, methods=["POST"])
+    app.logger.info(f"Request profiling enabled (profiles in {PROFILE_DIR})")
+    return True
@@ -0,0 +1,220 @@
+"""
+Cohort-level aggregation for clinic statistics.
+
+Scores a cohort in vectorized chunks and returns only aggregate statistics
+(risk-score histogram and percentiles, level distribution, mean |SHAP| per
+feature, recommendation counts) - never per-patient rows. Chunks are scored
+in parallel and merged as they complete, so memory stays bounded by
+chunk_size * in-flight chunks regardless of cohort size.
+"""
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scoring.rule_based import (
+    RECS, score_batch, risk_levels_from_scores, recommendation_flags
+)
+
+FEATURE_NAMES = [
+    "hba1c", "crp", "creatinine", "albumin", "esr", "sodium",
+    "age", "diabetes_duration_years",
+    "has_hypertension", "has_neuropathy", "has_pvd"
+]
+
+REQUIRED_FIELDS = FEATURE_NAMES[:8]
+BOOL_FIELDS = FEATURE_NAMES[8:]
+
+RISK_LEVEL_NAMES = ["low", "moderate", "high"]
+RECOMMENDATION_KEYS = list(RECS["fr"].keys())
+
+PERCENTILES = [5, 10, 25, 50, 75, 90, 95]
+HISTOGRAM_BIN_WIDTH = 10
+DEFAULT_CHUNK_SIZE = 10000
+MAX_CHUNK_SIZE = 100000
+
+# Accepted spellings of the boolean risk factors (compared lower-cased)
+TRUE_TOKENS = {"1", "1.0", "true", "yes"}
+FALSE_TOKENS = {"0", "0.0", "false", "no"}
+
+
+def iter_record_chunks(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size rows from a list of patient dicts.
+
+    Raises ValueError if a record is not a dict.
+    """
+    for start in range(0, len(records), chunk_size):
+        batch = records[start:start + chunk_size]
+        if not all(isinstance(r, dict) for r in batch):
+            raise ValueError("Chaque patient doit etre un objet JSON")
+        yield pd.DataFrame.from_records(batch)
+
+
+def iter_csv_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream a cohort CSV in chunks, reading only the feature columns."""
+    return pd.read_csv(path, chunksize=chunk_size, usecols=lambda c: c in FEATURE_NAMES)
+
+
+def _parse_flag(value):
+    """1/0 for a known true/false token (any case), 0 if missing, NaN if unrecognised."""
+    if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+        return 0
+    token = str(value).strip().lower()
+    if token in TRUE_TOKENS:
+        return 1
+    if token in FALSE_TOKENS:
+        return 0
+    return np.nan
+
+
+def _prepare_chunk(df):
+    """Coerce a raw chunk to the model feature frame; drop rows with missing
+    required fields or unrecognised boolean values."""
+    missing = [f for f in REQUIRED_FIELDS if f not in df.columns]
+    if missing:
+        raise ValueError(f"Champs manquants: {missing}")
+
+    X = pd.DataFrame(index=df.index)
+    for field in REQUIRED_FIELDS:
+        X[field] = pd.to_numeric(df[field], errors="coerce")
+    for field in BOOL_FIELDS:
+        if field in df.columns:
+            X[field] = df[field].map(_parse_flag)
+        else:
+            X[field] = 0
+
+    valid = X.notna().all(axis=1).to_numpy()
+    n_invalid = int((~valid).sum())
+    if n_invalid:
+        X = X[valid]
+    X[BOOL_FIELDS] = X[BOOL_FIELDS].astype(int)
+    return X.reset_index(drop=True), n_invalid
+
+
+def _aggregate_chunk(df, score_fn, explainer, predict_kwargs):
+    """Score one chunk and reduce it to mergeable partial sums."""
+    X, n_invalid = _prepare_chunk(df)
+    partial = {
+        "n": len(X),
+        "n_invalid": n_invalid,
+        "score_counts": np.zeros(101, dtype=np.int64),
+        "level_counts": np.zeros(len(RISK_LEVEL_NAMES), dtype=np.int64),
+        "shap_abs_sum": None,
+        "rec_counts": dict.fromkeys(RECOMMENDATION_KEYS, 0),
+    }
+    if len(X) == 0:
+        return partial
+
+    if score_fn is not None:
+        raw, levels = score_fn(X, **predict_kwargs)
+        scores = np.clip(np.round(raw), 0, 100).astype(int)
+        levels = np.asarray(levels, dtype=int)
+    else:
+        scores = score_batch(X)
+        levels = risk_levels_from_scores(scores)
+
+    partial["score_counts"] = np.bincount(scores, minlength=101)
+    partial["level_counts"] = np.bincount(levels, minlength=len(RISK_LEVEL_NAMES))
+
+    if explainer is not None:
+        sv = np.asarray(explainer.shap_values(X))
+        partial["shap_abs_sum"] = np.abs(sv).sum(axis=0)
+
+    for key, mask in recommendation_flags(X, scores).items():
+        partial["rec_counts"][key] = int(np.count_nonzero(mask))
+
+    return partial
+
+
+def _merge(total, partial):
+    total["n"] += partial["n"]
+    total["n_invalid"] += partial["n_invalid"]
+    total["score_counts"] += partial["score_counts"]
+    total["level_counts"] += partial["level_counts"]
+    if partial["shap_abs_sum"] is not None:
+        if total["shap_abs_sum"] is None:
+            total["shap_abs_sum"] = np.zeros(len(FEATURE_NAMES))
+        total["shap_abs_sum"] += partial["shap_abs_sum"]
+    for key, count in partial["rec_counts"].items():
+        total["rec_counts"][key] += count
+
+
+def _percentiles(score_counts, n):
+    """Nearest-rank percentiles from the exact 0-100 integer score histogram."""
+    cumulative = np.cumsum(score_counts)
+    result = {}
+    for p in PERCENTILES:
+        rank = max(int(np.ceil(p / 100 * n)), 1)
+        result[f"p{p}"] = int(np.searchsorted(cumulative, rank))
+    return result
+
+
+def _histogram(score_counts):
+    bins = []
+    for lo in range(0, 100, HISTOGRAM_BIN_WIDTH):
+        hi = lo + HISTOGRAM_BIN_WIDTH - 1
+        if hi + 1 >= 100:
+            hi = 100
+        bins.append({"bin": f"{lo}-{hi}", "count": int(score_counts[lo:hi + 1].sum())})
+    return bins
+
+
+def summarize_cohort(chunks, score_fn=None, explainer=None, max_workers=None):
+    """Aggregate a stream of patient DataFrames into a cohort summary.
+
+    score_fn(X, **predict_kwargs) returns (raw risk scores, level indices);
+    without it the vectorized rule-based scorer is used.
+    Chunks are scored on a thread pool (LightGBM and SHAP release the GIL);
+    at most 2 * max_workers chunks are held in memory at once.
+    """
+    workers = max_workers or int(os.environ.get("COHORT_WORKERS", os.cpu_count() or 1))
+    # Parallelism comes from the chunk pool: keep each LightGBM call single-threaded
+    # so the workers don't oversubscribe the CPU.
+    predict_kwargs = {"num_threads": 1} if workers > 1 else {}
+
+    total = {
+        "n": 0,
+        "n_invalid": 0,
+        "score_counts": np.zeros(101, dtype=np.int64),
+        "level_counts": np.zeros(len(RISK_LEVEL_NAMES), dtype=np.int64),
+        "shap_abs_sum": None,
+        "rec_counts": dict.fromkeys(RECOMMENDATION_KEYS, 0),
+    }
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(
+                _aggregate_chunk, chunk, score_fn, explainer, predict_kwargs
+            ))
+            if len(pending) >= 2 * workers:
+                _merge(total, pending.popleft().result())
+        while pending:
+            _merge(total, pending.popleft().result())
+
+    n = total["n"]
+    summary = {
+        "n_patients": n,
+        "n_invalid": total["n_invalid"],
+        "risk_score": None,
+        "risk_levels": {name: int(c) for name, c in zip(RISK_LEVEL_NAMES, total["level_counts"])},
+        "mean_abs_shap": None,
+        "recommendations": total["rec_counts"],
+    }
+    if n == 0:
+        return summary
+
+    scores = np.arange(101)
+    summary["risk_score"] = {
+        "mean": round(float((scores * total["score_counts"]).sum() / n), 2),
+        "percentiles": _percentiles(total["score_counts"], n),
+        "histogram": _histogram(total["score_counts"]),
+    }
+    if total["shap_abs_sum"] is not None:
+        summary["mean_abs_shap"] = {
+            fname: round(float(v / n), 3)
+            for fname, v in zip(FEATURE_NAMES, total["shap_abs_sum"])
+        }
+    return summary
@@ -0,0 +1,143 @@
+"""
+Early-exit (staged) evaluation of the LightGBM boosters.
+
+Trees are evaluated in stages; after each stage a row stops as soon as the
+trees still to come cannot change its result by more than allowed:
+  - regressor: the remaining-contribution interval [lo, hi] must keep the
+    clipped 0-100 score within +/- tolerance points;
+  - classifier: the leading class's margin over every other class must
+    exceed the largest drop the remaining trees can cause.
+
+Bounds are either exact (summed per-tree leaf extremes from the model dump,
+a hard guarantee) or empirical (quantile q of the remaining contribution
+measured on calibration data by training/train_model.py, stored in
+foot_risk_early_exit.json). Exact bounds grow with every remaining tree and,
+for the 300-tree foot risk models, never let the regressor exit before the
+last stage; they serve as a reference rather than a speedup.
+
+Each stage is a separate booster call, so early exit only saves time on
+batches: for a single row the per-call overhead outweighs the skipped trees.
+"""
+import json
+
+import numpy as np
+
+EARLY_EXIT_FILENAME = "foot_risk_early_exit.json"
+STAGE_STEP = 50
+
+
+def _leaf_values(node):
+    if "leaf_value" in node:
+        return [node["leaf_value"]]
+    return _leaf_values(node["left_child"]) + _leaf_values(node["right_child"])
+
+
+class StagedBooster:
+    """A LightGBM booster split into evaluation stages, with per-stage exit bounds."""
+
+    def __init__(self, booster, stages=None):
+        self.booster = booster
+        self.num_class = booster.num_model_per_iteration()
+        self.n_iter = booster.current_iteration()
+        if stages is None:
+            stages = range(STAGE_STEP, self.n_iter, STAGE_STEP)
+        self.stages = sorted(s for s in stages if 0 < s < self.n_iter)
+        self.stages.append(self.n_iter)
+
+        leaf_min = np.zeros((self.n_iter, self.num_class))
+        leaf_max = np.zeros((self.n_iter, self.num_class))
+        for i, tree in enumerate(booster.dump_model()["tree_info"]):
+            values = _leaf_values(tree["tree_structure"])
+            it, k = divmod(i, self.num_class)
+            leaf_min[it, k], leaf_max[it, k] = min(values), max(values)
+
+        # suffix[s] = sum over iterations s..n_iter-1, with suffix[n_iter] = 0
+        self._suffix_min = np.vstack([np.cumsum(leaf_min[::-1], axis=0)[::-1], np.zeros(self.num_class)])
+        self._suffix_max = np.vstack([np.cumsum(leaf_max[::-1], axis=0)[::-1], np.zeros(self.num_class)])
+
+    def raw(self, X, start, end, **predict_kwargs):
+        """Raw margins contributed by iterations [start, end), shape (n, num_class)."""
+        out = self.booster.predict(
+            X, start_iteration=start, num_iteration=end - start, raw_score=True, **predict_kwargs
+        )
+        return np.asarray(out).reshape(len(X), self.num_class)
+
+    def exact_bounds(self):
+        """Hard per-stage bounds derived from leaf extremes."""
+        bounds = []
+        for stage in self.stages[:-1]:
+            lo, hi = self._suffix_min[stage], self._suffix_max[stage]
+            # drop[a][b]: worst-case decrease of margin(a) - margin(b)
+            drop = hi[None, :] - lo[:, None]
+            bounds.append({"lo": float(lo[0]), "hi": float(hi[0]), "drop": drop.tolist()})
+        return bounds
+
+    def calibrate(self, X, q=0.99):
+        """Empirical per-stage bounds: quantile q of the remaining contribution on X."""
+        X = np.asarray(X, dtype=float)
+        total = self.raw(X, 0, self.n_iter)
+        bounds = []
+        for stage in self.stages[:-1]:
+            rest = total - self.raw(X, 0, stage)
+            change = rest[:, None, :] - rest[:, :, None]  # [n, a, b] = rest_b - rest_a
+            bounds.append({
+                "lo": float(np.quantile(rest[:, 0], 1 - q)),
+                "hi": float(np.quantile(rest[:, 0], q)),
+                "drop": np.quantile(change, q, axis=0).tolist(),
+            })
+        return bounds
+
+
+def load_early_exit(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def predict_regression(staged, bounds, X, tolerance=0.5, **predict_kwargs):
+    """Early-exit regression. Returns (raw predictions, trees used per row)."""
+    X = np.asarray(X, dtype=float)
+    pred = np.zeros(len(X))
+    used = np.full(len(X), staged.n_iter)
+    active = np.arange(len(X))
+    start = 0
+    for i, stage in enumerate(staged.stages):
+        pred[active] += staged.raw(X[active], start, stage, **predict_kwargs)[:, 0]
+        start = stage
+        if stage == staged.n_iter:
+            break
+        lo, hi = bounds[i]["lo"], bounds[i]["hi"]
+        low = np.clip(pred[active] + lo, 0, 100)
+        high = np.clip(pred[active] + hi, 0, 100)
+        done = (high - low) <= 2 * tolerance
+        finished = active[done]
+        pred[finished] += (lo + hi) / 2
+        used[finished] = stage
+        active = active[~done]
+        if len(active) == 0:
+            break
+    return pred, used
+
+
+def predict_classes(staged, bounds, X, **predict_kwargs):
+    """Early-exit classification. Returns (raw margins, trees used per row); argmax is the class."""
+    X = np.asarray(X, dtype=float)
+    margins = np.zeros((len(X), staged.num_class))
+    used = np.full(len(X), staged.n_iter)
+    active = np.arange(len(X))
+    start = 0
+    for i, stage in enumerate(staged.stages):
+        margins[active] += staged.raw(X[active], start, stage, **predict_kwargs)
+        start = stage
+        if stage == staged.n_iter:
+            break
+        drop = np.array(bounds[i]["drop"])
+        np.fill_diagonal(drop, -np.inf)
+        m = margins[active]
+        leader = m.argmax(axis=1)
+        lead = m[np.arange(len(m)), leader][:, None] - m
+        done = (lead > drop[leader]).all(axis=1)
+        used[active[done]] = stage
+        active = active[~done]
+        if len(active) == 0:
+            break
+    return margins, used
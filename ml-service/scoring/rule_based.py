@@ -3,6 +3,7 @@ Rule-based diabetic foot risk scorer.
 Uses weighted clinical thresholds to produce a 0-100 risk score.
 Designed to be API-compatible with the LightGBM model for seamless swap.
 """
+import numpy as np
 
 RISK_LABELS = {
     "fr": {"low": "Risque Faible", "moderate": "Risque Modere", "high": "Risque Eleve"},
@@ -212,3 +213,63 @@ def _generate_recommendations(data: dict, score: float, risk_level: str, lang: s
     recs.append(r["hygiene"])
 
     return recs
+
+
+def score_batch(X) -> np.ndarray:
+    """Vectorized version of predict_foot_risk's scoring for a DataFrame of patients.
+
+    Returns integer risk scores (0-100), one per row, identical to the
+    per-patient scorer.
+    """
+    score = np.zeros(len(X))
+
+    hba1c = X["hba1c"].to_numpy(dtype=float)
+    score += np.select([hba1c >= 9.0, hba1c >= 7.5, hba1c >= 6.5], [20, 14, 8], 2)
+
+    crp = X["crp"].to_numpy(dtype=float)
+    score += np.select([crp >= 10, crp >= 3, crp >= 1], [15, 10, 5], 0)
+
+    creatinine = X["creatinine"].to_numpy(dtype=float)
+    score += np.select([creatinine >= 2.0, creatinine >= 1.3, creatinine >= 1.0], [15, 10, 5], 0)
+
+    duration = X["diabetes_duration_years"].to_numpy(dtype=float)
+    score += np.select([duration >= 20, duration >= 10, duration >= 5], [15, 10, 5], 0)
+
+    albumin = X["albumin"].to_numpy(dtype=float)
+    score += np.select([albumin < 2.5, albumin < 3.5], [10, 6], 1)
+
+    esr = X["esr"].to_numpy(dtype=float)
+    score += np.select([esr >= 40, esr >= 20], [10, 6], 1)
+
+    age = X["age"].to_numpy(dtype=float)
+    score += np.select([age >= 70, age >= 60, age >= 50], [10, 7, 4], 0)
+
+    sodium = X["sodium"].to_numpy(dtype=float)
+    score += np.select([sodium < 130, sodium < 135], [5, 3], 0)
+
+    score += 5 * X["has_neuropathy"].to_numpy(dtype=bool)
+    score += 5 * X["has_pvd"].to_numpy(dtype=bool)
+    score += 3 * X["has_hypertension"].to_numpy(dtype=bool)
+
+    return np.clip(np.round(score), 0, 100).astype(int)
+
+
+def risk_levels_from_scores(scores: np.ndarray) -> np.ndarray:
+    """Map risk scores to level indices (0=low, 1=moderate, 2=high)."""
+    return np.select([scores <= 30, scores <= 60], [0, 1], 2)
+
+
+def recommendation_flags(X, scores: np.ndarray) -> dict:
+    """Vectorized _generate_recommendations: one boolean mask per RECS key."""
+    return {
+        "urgent": scores > 60,
+        "exam": scores > 30,
+        "hba1c": X["hba1c"].to_numpy(dtype=float) >= 7.5,
+        "crp": X["crp"].to_numpy(dtype=float) >= 3,
+        "kidney": X["creatinine"].to_numpy(dtype=float) >= 1.3,
+        "nutrition": X["albumin"].to_numpy(dtype=float) < 3.5,
+        "esr": X["esr"].to_numpy(dtype=float) >= 20,
+        "neuropathy": X["has_neuropathy"].to_numpy(dtype=bool),
+        "pvd": X["has_pvd"].to_numpy(dtype=bool),
+        "hygiene": np.ones(len(X), dtype=bool),
+    }
@@ -0,0 +1,76 @@
+"""
+Distilled surrogate of the LightGBM ensemble.
+
+A GAM-style additive model: per-feature binned lookup tables plus a few
+pairwise interaction tables, fitted by training/train_model.py to the
+boosters' outputs and exported as a small JSON artifact. Scoring is a
+handful of bisects and table lookups, so it runs in microseconds and is
+mirrored by the Node fallback in server/services/footRiskService.js.
+
+Artifact layout:
+  features      feature order
+  edges         {feature: bin edges} for the per-feature tables
+  pair_edges    {feature: coarse bin edges} for the interaction tables
+  regressor     {"intercept", "main": {feature: table}, "pairs": [{"features", "table"}]}
+  classifier    {"classes", "margins": [one additive part per class]}
+"""
+import json
+from bisect import bisect_right
+
+import numpy as np
+
+SURROGATE_VERSION = "surrogate_v1"
+SURROGATE_FILENAME = "foot_risk_surrogate.json"
+
+
+def load_surrogate(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _additive(part, bins, pair_bins):
+    total = part["intercept"]
+    for fname, table in part["main"].items():
+        total += table[bins[fname]]
+    for pair in part["pairs"]:
+        a, b = pair["features"]
+        total += pair["table"][pair_bins[a]][pair_bins[b]]
+    return total
+
+
+def score_surrogate(model, features):
+    """Score one patient (dict of model features): returns (raw_score, class_idx)."""
+    bins = {f: bisect_right(model["edges"][f], features[f]) for f in model["features"]}
+    pair_bins = {f: bisect_right(edges, features[f]) for f, edges in model["pair_edges"].items()}
+
+    raw_score = _additive(model["regressor"], bins, pair_bins)
+    margins = [_additive(m, bins, pair_bins) for m in model["classifier"]["margins"]]
+    class_idx = max(range(len(margins)), key=margins.__getitem__)
+    return raw_score, class_idx
+
+
+def _additive_batch(part, bins, pair_bins):
+    total = np.full(len(next(iter(bins.values()))), part["intercept"], dtype=float)
+    for fname, table in part["main"].items():
+        total += np.asarray(table)[bins[fname]]
+    for pair in part["pairs"]:
+        a, b = pair["features"]
+        total += np.asarray(pair["table"])[pair_bins[a], pair_bins[b]]
+    return total
+
+
+def score_surrogate_batch(model, X):
+    """Vectorized score_surrogate for a DataFrame: returns (raw_scores, class margins)."""
+    bins = {
+        f: np.searchsorted(model["edges"][f], X[f].to_numpy(dtype=float), side="right")
+        for f in model["features"]
+    }
+    pair_bins = {
+        f: np.searchsorted(edges, X[f].to_numpy(dtype=float), side="right")
+        for f, edges in model["pair_edges"].items()
+    }
+    raw_scores = _additive_batch(model["regressor"], bins, pair_bins)
+    margins = np.column_stack([
+        _additive_batch(m, bins, pair_bins) for m in model["classifier"]["margins"]
+    ])
+    return raw_scores, margins
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Service modules are imported from the ml-service root (as in the Docker image)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
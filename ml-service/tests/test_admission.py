@@ -0,0 +1,160 @@
+"""Admission control: slot accounting, bounded queue and deadline expiry under threads."""
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, QueueFull, DeadlineExceeded, parse_deadline
+
+
+def _wait_until(predicate, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > end:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+def _acquire_in_thread(controller, deadline=None):
+    """Start a thread blocked in acquire(); returns (thread, outcome list)."""
+    outcome = []
+
+    def run():
+        try:
+            controller.acquire(deadline)
+            outcome.append("acquired")
+        except (QueueFull, DeadlineExceeded) as e:
+            outcome.append(type(e).__name__)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+@pytest.mark.parametrize("value", [None, "", "abc", "nan", "NaN", "inf", "-inf", "Infinity"])
+def test_parse_deadline_ignores_missing_malformed_and_non_finite(value):
+    assert parse_deadline(value) is None
+
+
+def test_parse_deadline_converts_budget_to_monotonic_deadline():
+    assert parse_deadline("250", now=100.0) == pytest.approx(100.25)
+
+
+def test_slots_up_to_max_concurrent_are_granted_immediately():
+    controller = AdmissionController(max_concurrent=3, max_queue=0)
+    for _ in range(3):
+        controller.acquire()
+    assert controller.stats()["in_flight"] == 3
+
+    with pytest.raises(QueueFull):
+        controller.acquire()
+
+    for _ in range(3):
+        controller.release()
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_full_queue_rejects_immediately():
+    controller = AdmissionController(max_concurrent=1, max_queue=1)
+    controller.acquire()
+    waiter, outcome = _acquire_in_thread(controller)
+    _wait_until(lambda: controller.stats()["queued"] == 1)
+
+    start = time.monotonic()
+    with pytest.raises(QueueFull):
+        controller.acquire()
+    assert time.monotonic() - start < 0.1
+    assert controller.stats()["rejected"] == 1
+
+    controller.release()
+    waiter.join(1)
+    assert outcome == ["acquired"]
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["queued"]) == (1, 0)
+    controller.release()
+
+
+def test_deadline_expiring_while_queued_frees_the_queue_slot():
+    controller = AdmissionController(max_concurrent=1, max_queue=1)
+    controller.acquire()
+
+    waiter, outcome = _acquire_in_thread(controller, deadline=time.monotonic() + 0.05)
+    waiter.join(1)
+
+    assert outcome == ["DeadlineExceeded"]
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["queued"], stats["expired"]) == (1, 0, 1)
+
+    # The expired waiter left no queue or slot behind
+    waiter, outcome = _acquire_in_thread(controller)
+    _wait_until(lambda: controller.stats()["queued"] == 1)
+    controller.release()
+    waiter.join(1)
+    assert outcome == ["acquired"]
+    controller.release()
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_queue_timeout_applies_without_deadline():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout_ms=50)
+    controller.acquire()
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        controller.acquire()
+    assert 0.04 < time.monotonic() - start < 1.0
+    assert controller.stats()["queued"] == 0
+    controller.release()
+
+
+def test_expired_deadline_is_dropped_without_queueing():
+    controller = AdmissionController(max_concurrent=1, max_queue=1)
+    with pytest.raises(DeadlineExceeded):
+        controller.acquire(deadline=time.monotonic() - 1)
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["queued"], stats["expired"]) == (0, 0, 1)
+
+
+def test_counters_balance_under_contention():
+    controller = AdmissionController(max_concurrent=2, max_queue=3, queue_timeout_ms=200)
+    lock = threading.Lock()
+    running = []
+    peak = [0]
+    outcomes = []
+
+    def request(i):
+        deadline = time.monotonic() + 0.03 if i % 3 == 0 else None
+        try:
+            controller.acquire(deadline)
+        except (QueueFull, DeadlineExceeded) as e:
+            with lock:
+                outcomes.append(type(e).__name__)
+            return
+        try:
+            with lock:
+                running.append(i)
+                peak[0] = max(peak[0], len(running))
+            time.sleep(0.005)
+            with lock:
+                running.remove(i)
+                outcomes.append("acquired")
+        finally:
+            controller.release()
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(60)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    stats = controller.stats()
+    assert len(outcomes) == 60
+    assert peak[0] <= 2
+    assert (stats["in_flight"], stats["queued"]) == (0, 0)
+    assert stats["rejected"] == outcomes.count("QueueFull")
+    assert stats["expired"] == outcomes.count("DeadlineExceeded")
+
+    # Every slot was released: both can be taken again (a leak would time out)
+    controller.acquire()
+    controller.acquire()
+    assert controller.stats()["in_flight"] == 2
@@ -0,0 +1,43 @@
+"""Request validation of the Flask endpoints."""
+import pytest
+
+import app as service
+
+PANEL = {
+    "hba1c": 8, "crp": 3, "creatinine": 1.2, "albumin": 3.4, "esr": 22, "sodium": 138,
+    "age": 60, "diabetes_duration_years": 12,
+}
+
+
+@pytest.fixture
+def client():
+    return service.app.test_client()
+
+
+@pytest.mark.parametrize("body", [[1, 2], "text", 3, {"patients": [1, 2, 3]}, {"patients": "x"}])
+def test_cohort_summary_rejects_malformed_bodies(client, body):
+    response = client.post("/cohort/summary", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_cohort_summary_inline_batch(client):
+    response = client.post("/cohort/summary", json={"patients": [PANEL] * 5})
+    assert response.status_code == 200
+    assert response.get_json()["n_patients"] == 5
+
+
+def test_single_row_early_exit_is_served_by_the_full_ensemble(client):
+    full = client.post("/predict", json={**PANEL, "explain": "none"}).get_json()
+    early = client.post("/predict", json={**PANEL, "explain": "none", "inference": "early_exit"}).get_json()
+    assert "inference" not in early
+    assert early["risk_score"] == full["risk_score"]
+    assert early["risk_level"] == full["risk_level"]
+
+
+def test_deferred_explanation_marks_a_full_queue(client, monkeypatch):
+    monkeypatch.setattr(service, "_explanations", None)
+    result = client.post("/predict", json={**PANEL, "explain": "deferred"}).get_json()
+    assert result["explanation"] == "unavailable"
+    assert "explanation_id" not in result
+    assert result["shap_values"] is None
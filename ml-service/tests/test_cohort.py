@@ -0,0 +1,139 @@
+"""Cohort aggregation checked against the per-patient rule-based scorer."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring.cohort import (
+    summarize_cohort, iter_record_chunks, iter_csv_chunks, _percentiles, _prepare_chunk,
+    FEATURE_NAMES, PERCENTILES, RECOMMENDATION_KEYS,
+)
+from scoring.rule_based import (
+    predict_foot_risk, score_batch, risk_levels_from_scores, recommendation_flags, RECS,
+)
+
+LEVELS = ["low", "moderate", "high"]
+
+
+def _random_patients(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "hba1c": round(float(rng.uniform(4, 13)), 1),
+            "crp": round(float(rng.uniform(0, 20)), 1),
+            "creatinine": round(float(rng.uniform(0.5, 3)), 2),
+            "albumin": round(float(rng.uniform(2, 5)), 1),
+            "esr": round(float(rng.uniform(0, 60))),
+            "sodium": round(float(rng.uniform(125, 145))),
+            "age": int(rng.integers(20, 90)),
+            "diabetes_duration_years": int(rng.integers(0, 30)),
+            "has_hypertension": bool(rng.random() < 0.4),
+            "has_neuropathy": bool(rng.random() < 0.3),
+            "has_pvd": bool(rng.random() < 0.2),
+        }
+        for _ in range(n)
+    ]
+
+
+# Values sitting exactly on every rule threshold
+BOUNDARY_PATIENTS = [
+    {"hba1c": h, "crp": c, "creatinine": cr, "albumin": a, "esr": e, "sodium": s,
+     "age": age, "diabetes_duration_years": d,
+     "has_hypertension": True, "has_neuropathy": False, "has_pvd": True}
+    for h, c, cr, a, e, s, age, d in [
+        (9.0, 10, 2.0, 2.5, 40, 130, 70, 20),
+        (7.5, 3, 1.3, 3.5, 20, 135, 60, 10),
+        (6.5, 1, 1.0, 2.49, 19, 129, 50, 5),
+    ]
+]
+
+
+@pytest.fixture(scope="module")
+def patients():
+    return _random_patients(2000) + BOUNDARY_PATIENTS
+
+
+def test_score_batch_matches_per_patient_scorer(patients):
+    X = pd.DataFrame(patients)[FEATURE_NAMES]
+    scores = score_batch(X)
+    expected = [predict_foot_risk(p) for p in patients]
+
+    assert scores.tolist() == [r["risk_score"] for r in expected]
+    levels = risk_levels_from_scores(scores)
+    assert [LEVELS[i] for i in levels] == [r["risk_level"] for r in expected]
+
+
+def test_recommendation_flags_match_per_patient_recommendations(patients):
+    X = pd.DataFrame(patients)[FEATURE_NAMES]
+    scores = score_batch(X)
+    flags = recommendation_flags(X, scores)
+    texts = RECS["fr"]
+
+    for i, p in enumerate(patients):
+        recs = predict_foot_risk(p)["recommendations"]
+        assert [texts[k] for k in RECOMMENDATION_KEYS if flags[k][i]] == recs
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 100, 1001])
+def test_percentiles_match_numpy_inverted_cdf(n):
+    scores = np.random.default_rng(n).integers(0, 101, size=n)
+    counts = np.bincount(scores, minlength=101)
+
+    result = _percentiles(counts, n)
+
+    for p in PERCENTILES:
+        assert result[f"p{p}"] == int(np.percentile(scores, p, method="inverted_cdf"))
+
+
+def test_summary_matches_per_patient_aggregation(patients):
+    expected = [predict_foot_risk(p) for p in patients]
+    scores = np.array([r["risk_score"] for r in expected])
+
+    summary = summarize_cohort(iter_record_chunks(patients, chunk_size=300), max_workers=3)
+
+    assert summary["n_patients"] == len(patients)
+    assert summary["n_invalid"] == 0
+    assert summary["risk_levels"] == {
+        level: sum(r["risk_level"] == level for r in expected) for level in LEVELS
+    }
+    assert summary["risk_score"]["mean"] == round(float(scores.mean()), 2)
+    assert sum(b["count"] for b in summary["risk_score"]["histogram"]) == len(patients)
+    assert summary["risk_score"]["percentiles"] == {
+        f"p{p}": int(np.percentile(scores, p, method="inverted_cdf")) for p in PERCENTILES
+    }
+    texts = RECS["fr"]
+    assert summary["recommendations"] == {
+        key: sum(texts[key] in r["recommendations"] for r in expected)
+        for key in RECOMMENDATION_KEYS
+    }
+
+
+def test_summary_is_independent_of_chunking(patients):
+    whole = summarize_cohort(iter_record_chunks(patients, chunk_size=len(patients)), max_workers=1)
+    chunked = summarize_cohort(iter_record_chunks(patients, chunk_size=97), max_workers=4)
+    assert whole == chunked
+
+
+def test_csv_boolean_tokens_and_invalid_rows():
+    header = ",".join(FEATURE_NAMES[:8] + ["has_pvd"])
+    rows = ["7,1,1,4,10,140,50,5," + v for v in ["false", "False", "0", "no", "YES", "1", "maybe"]]
+    rows.append("7,,1,4,10,140,50,5,0")
+    path = io.StringIO("\n".join([header] + rows) + "\n")
+
+    X, n_invalid = _prepare_chunk(next(iter_csv_chunks(path)))
+
+    assert X["has_pvd"].tolist() == [0, 0, 0, 0, 1, 1]
+    assert X["has_neuropathy"].tolist() == [0] * 6
+    assert n_invalid == 2
+
+
+def test_non_object_records_are_rejected():
+    with pytest.raises(ValueError):
+        summarize_cohort(iter_record_chunks([1, 2, 3]))
+
+
+def test_empty_cohort():
+    summary = summarize_cohort(iter_record_chunks([]))
+    assert summary["n_patients"] == 0
+    assert summary["risk_score"] is None
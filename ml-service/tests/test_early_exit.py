@@ -0,0 +1,154 @@
+"""Staged early-exit evaluation: bound soundness and exit logic on small boosters."""
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from scoring.early_exit import StagedBooster, predict_regression, predict_classes
+
+N_TREES = 60
+STAGES = [10, 20, 40]
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 4))
+    score = 50 + 15 * X[:, 0] + 10 * X[:, 1] * X[:, 2] + rng.normal(scale=3, size=len(X))
+    classes = np.digitize(score, [40, 60])
+    return X, np.clip(score, 0, 100), classes
+
+
+@pytest.fixture(scope="module")
+def regressor(data):
+    X, y, _ = data
+    model = lgb.LGBMRegressor(n_estimators=N_TREES, num_leaves=8, learning_rate=0.1, verbose=-1)
+    return model.fit(X, y).booster_
+
+
+@pytest.fixture(scope="module")
+def classifier(data):
+    X, _, y = data
+    model = lgb.LGBMClassifier(n_estimators=N_TREES, num_leaves=8, learning_rate=0.1, verbose=-1)
+    return model.fit(X, y).booster_
+
+
+def test_stages_end_with_every_tree(regressor):
+    staged = StagedBooster(regressor, [40, 10, 0, 20, N_TREES, 500])
+    assert staged.stages == [10, 20, 40, N_TREES]
+    assert StagedBooster(regressor).stages == [50, N_TREES]
+
+
+def test_raw_stages_sum_to_full_prediction(data, classifier):
+    X = data[0]
+    staged = StagedBooster(classifier, STAGES)
+    parts = staged.raw(X, 0, 20) + staged.raw(X, 20, N_TREES)
+    np.testing.assert_allclose(parts, classifier.predict(X, raw_score=True), atol=1e-9)
+
+
+def test_exact_bounds_contain_the_remaining_contribution(data, regressor, classifier):
+    X = data[0]
+    staged_reg = StagedBooster(regressor, STAGES)
+    staged_clf = StagedBooster(classifier, STAGES)
+    reg_total = staged_reg.raw(X, 0, N_TREES)[:, 0]
+    clf_total = staged_clf.raw(X, 0, N_TREES)
+
+    for stage, reg_b, clf_b in zip(STAGES, staged_reg.exact_bounds(), staged_clf.exact_bounds()):
+        rest = reg_total - staged_reg.raw(X, 0, stage)[:, 0]
+        assert reg_b["lo"] <= rest.min() and rest.max() <= reg_b["hi"]
+
+        rest = clf_total - staged_clf.raw(X, 0, stage)
+        drop = np.array(clf_b["drop"])
+        for a in range(3):
+            for b in range(3):
+                if a != b:
+                    # margin(a) - margin(b) can fall by at most drop[a][b]
+                    decrease = rest[:, b] - rest[:, a]
+                    assert decrease.max() <= drop[a, b] + 1e-9
+
+
+def test_exact_bounds_shrink_towards_the_last_stage(regressor):
+    bounds = StagedBooster(regressor, STAGES).exact_bounds()
+    widths = [b["hi"] - b["lo"] for b in bounds]
+    assert widths == sorted(widths, reverse=True)
+
+
+def test_calibrate_covers_the_requested_quantile(data, regressor, classifier):
+    X = data[0]
+    staged = StagedBooster(regressor, STAGES)
+    total = staged.raw(X, 0, N_TREES)[:, 0]
+    for stage, b in zip(STAGES, staged.calibrate(X, q=0.95)):
+        rest = total - staged.raw(X, 0, stage)[:, 0]
+        assert b["lo"] <= b["hi"]
+        assert np.mean((rest >= b["lo"]) & (rest <= b["hi"])) >= 0.9 - 1e-9
+
+    clf_bounds = StagedBooster(classifier, STAGES).calibrate(X, q=0.95)
+    assert np.array(clf_bounds[0]["drop"]).shape == (3, 3)
+
+
+def test_regression_with_exact_bounds_stays_within_tolerance(data, regressor):
+    X = data[0]
+    staged = StagedBooster(regressor, STAGES)
+    full = np.clip(regressor.predict(X), 0, 100)
+
+    for tolerance in (0.5, 2.0, 10.0):
+        pred, used = predict_regression(staged, staged.exact_bounds(), X, tolerance)
+        assert np.abs(np.clip(pred, 0, 100) - full).max() <= tolerance + 1e-9
+        assert set(used) <= set(staged.stages)
+
+
+def test_regression_exits_early_when_bounds_allow(data, regressor):
+    X = data[0]
+    staged = StagedBooster(regressor, STAGES)
+    bounds = [{"lo": -1.0, "hi": 3.0}] * len(STAGES)
+
+    pred, used = predict_regression(staged, bounds, X, tolerance=2.0)
+
+    assert (used == STAGES[0]).all()
+    # Exited rows get the midpoint of the remaining-contribution interval
+    np.testing.assert_allclose(pred, staged.raw(X, 0, STAGES[0])[:, 0] + 1.0)
+
+
+def test_regression_without_slack_uses_every_tree(data, regressor):
+    X = data[0]
+    staged = StagedBooster(regressor, STAGES)
+    bounds = [{"lo": -1.0, "hi": 1.0}] * len(STAGES)
+
+    pred, used = predict_regression(staged, bounds, X, tolerance=0.0)
+
+    # Rows clipped at 0 or 100 may still exit; everything else runs to the end
+    inside = (pred > 1) & (pred < 99)
+    assert (used[inside] == N_TREES).all()
+    np.testing.assert_allclose(pred[inside], regressor.predict(X)[inside])
+
+
+def test_classes_with_exact_bounds_match_the_full_model(data, classifier):
+    X = data[0]
+    staged = StagedBooster(classifier, STAGES)
+
+    margins, used = predict_classes(staged, staged.exact_bounds(), X)
+
+    full = classifier.predict(X, raw_score=True).argmax(axis=1)
+    assert (margins.argmax(axis=1) == full).all()
+    assert set(used) <= set(staged.stages)
+
+
+def test_classes_exit_at_first_stage_with_unbounded_lead(data, classifier):
+    X = data[0]
+    staged = StagedBooster(classifier, STAGES)
+    bounds = [{"drop": np.full((3, 3), -np.inf).tolist()}] * len(STAGES)
+
+    margins, used = predict_classes(staged, bounds, X)
+
+    assert (used == STAGES[0]).all()
+    np.testing.assert_allclose(margins, staged.raw(X, 0, STAGES[0]))
+
+
+def test_classes_never_exit_when_drops_are_infinite(data, classifier):
+    X = data[0]
+    staged = StagedBooster(classifier, STAGES)
+    bounds = [{"drop": np.full((3, 3), np.inf).tolist()}] * len(STAGES)
+
+    margins, used = predict_classes(staged, bounds, X)
+
+    assert (used == N_TREES).all()
+    np.testing.assert_allclose(margins, classifier.predict(X, raw_score=True), atol=1e-9)
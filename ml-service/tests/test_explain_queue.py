@@ -0,0 +1,130 @@
+"""Deferred SHAP queue: batching, long-poll wake-up, TTL and bounded storage."""
+import threading
+import time
+
+import pytest
+
+from explain_queue import ExplanationQueue
+
+
+class FakeExplainer:
+    """explain_batch stand-in that blocks until opened and records batch sizes."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.gate = threading.Event()
+        self.called = threading.Event()
+        self.batches = []
+
+    def __call__(self, X):
+        self.called.set()
+        self.gate.wait(5)
+        self.batches.append(len(X))
+        if self.fail:
+            raise RuntimeError("boom")
+        return X.to_numpy()
+
+
+@pytest.fixture
+def explainer():
+    fake = FakeExplainer()
+    yield fake
+    fake.gate.set()  # never leave a worker blocked
+
+
+def _queue(explainer, **kwargs):
+    return ExplanationQueue(explainer, lambda row: {"x": float(row[0])}, **kwargs)
+
+
+def _wait_done(queue, job_id):
+    entry = queue.get(job_id, wait=2)
+    assert entry is not None and entry["status"] != "pending"
+    return entry
+
+
+def test_pending_jobs_are_explained_in_batches(explainer):
+    queue = _queue(explainer, max_batch=3)
+    first = queue.submit({"x": 0})
+    assert explainer.called.wait(1)  # the worker is busy with the first job
+    rest = [queue.submit({"x": i}) for i in range(1, 6)]
+
+    explainer.gate.set()
+    entries = [_wait_done(queue, job_id) for job_id in [first] + rest]
+
+    assert explainer.batches == [1, 3, 2]
+    assert [e["shap_values"] for e in entries] == [{"x": float(i)} for i in range(6)]
+    assert all(e["status"] == "done" for e in entries)
+
+
+def test_long_poll_wakes_up_when_the_batch_finishes(explainer):
+    queue = _queue(explainer)
+    job_id = queue.submit({"x": 1})
+
+    start = time.monotonic()
+    assert queue.get(job_id, wait=0.05)["status"] == "pending"
+    assert time.monotonic() - start >= 0.04
+
+    threading.Timer(0.05, explainer.gate.set).start()
+    start = time.monotonic()
+    entry = queue.get(job_id, wait=5)
+    assert entry["status"] == "done"
+    assert time.monotonic() - start < 2
+
+
+def test_failed_batch_marks_every_job_failed():
+    explainer = FakeExplainer(fail=True)
+    explainer.gate.set()
+    queue = _queue(explainer)
+
+    ids = [queue.submit({"x": i}) for i in range(3)]
+
+    for job_id in ids:
+        assert _wait_done(queue, job_id) == {"status": "failed", "shap_values": None}
+
+
+def test_results_expire_after_ttl(explainer):
+    explainer.gate.set()
+    queue = _queue(explainer, ttl_seconds=0.05)
+    job_id = queue.submit({"x": 1})
+    _wait_done(queue, job_id)
+
+    time.sleep(0.1)
+
+    assert queue.get(job_id) is None
+    assert queue.get("unknown") is None
+
+
+def test_full_store_evicts_the_oldest_finished_result(explainer):
+    explainer.gate.set()
+    queue = _queue(explainer, max_results=2)
+    ids = []
+    for i in range(3):
+        ids.append(queue.submit({"x": i}))
+        _wait_done(queue, ids[-1])
+
+    assert queue.get(ids[0]) is None
+    assert queue.get(ids[1])["status"] == "done"
+    assert queue.stats()["stored"] == 2
+
+
+def test_full_store_never_evicts_pending_jobs(explainer):
+    queue = _queue(explainer, max_results=2)
+    a = queue.submit({"x": 1})
+    b = queue.submit({"x": 2})
+
+    assert queue.submit({"x": 3}) is None
+
+    explainer.gate.set()
+    assert _wait_done(queue, a)["status"] == "done"
+    assert _wait_done(queue, b)["status"] == "done"
+    assert queue.submit({"x": 4}) is not None
+
+
+def test_full_job_queue_rejects_and_forgets_the_job(explainer):
+    queue = _queue(explainer, max_pending=1)
+    queue.submit({"x": 1})
+    assert explainer.called.wait(1)  # first job taken by the worker
+    queue.submit({"x": 2})           # fills the job queue
+
+    assert queue.submit({"x": 3}) is None
+    assert queue.stats() == {"pending": 1, "stored": 2}
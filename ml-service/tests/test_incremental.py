@@ -0,0 +1,128 @@
+"""Incremental training helpers: fixed holdout, continued boosting and the update guard."""
+import json
+import os
+import sys
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training"))
+
+import train_model  # noqa: E402
+from generate_data import generate_dataset  # noqa: E402
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Point the training script at a scratch dataset and manifest."""
+    data_path = tmp_path / "data.csv"
+    manifest_path = tmp_path / "training_manifest.json"
+    monkeypatch.setattr(train_model, "DATA_PATH", str(data_path))
+    monkeypatch.setattr(train_model, "MANIFEST_PATH", str(manifest_path))
+
+    full = generate_dataset(n=600, seed=1)
+
+    def write(n_rows, holdout_rows=None):
+        # Later calls append rows to the same dataset
+        full.iloc[:n_rows].to_csv(data_path, index=False)
+        if holdout_rows is not None:
+            manifest_path.write_text(json.dumps({"holdout_rows": holdout_rows}))
+    return write
+
+
+def test_load_split_without_manifest_splits_every_row(workspace):
+    workspace(500)
+    X_train, X_test, *_ = train_model.load_split()
+    assert len(X_train) + len(X_test) == 500
+    assert len(X_test) == 100
+
+
+def test_load_split_keeps_the_holdout_fixed_as_rows_are_appended(workspace):
+    workspace(400, holdout_rows=400)
+    _, X_test_before, _, ys_test_before, _, _ = train_model.load_split()
+
+    workspace(520, holdout_rows=400)
+    X_train, X_test, ys_train, ys_test, yc_train, yc_test = train_model.load_split()
+
+    pd.testing.assert_frame_equal(X_test, X_test_before)
+    np.testing.assert_array_equal(ys_test, ys_test_before)
+    # Appended rows only join the training side, with their labels aligned
+    appended = X_train[X_train.index >= 400]
+    assert sorted(appended.index) == list(range(400, 520))
+    assert len(X_train) == len(ys_train) == len(yc_train) == 520 - len(X_test)
+    X, y_score, _ = train_model.load_data()
+    np.testing.assert_array_equal(ys_train[-120:], y_score[400:])
+
+
+def test_calibration_rows_exclude_appended_rows(workspace):
+    workspace(520, holdout_rows=400)
+    X_train, *_ = train_model.load_split()
+
+    rows = train_model.calibration_rows(X_train, {"holdout_rows": 400})
+
+    assert (rows.index < 400).all()
+    assert len(rows) == len(X_train) - 120
+    assert train_model.calibration_rows(X_train, None) is X_train
+
+
+def test_bounded_sample_is_deterministic():
+    X = pd.DataFrame({"a": range(100)})
+    assert train_model.bounded_sample(X, 200) is X
+    sample = train_model.bounded_sample(X, 10)
+    assert len(sample) == 10
+    pd.testing.assert_frame_equal(sample, train_model.bounded_sample(X, 10))
+
+
+@pytest.mark.parametrize("model_cls, target", [
+    (lgb.LGBMRegressor, lambda X: 3 * X[:, 0] + X[:, 1]),
+    (lgb.LGBMClassifier, lambda X: np.digitize(X[:, 0], [-0.5, 0.5])),
+])
+def test_continue_boosting_appends_trees_and_keeps_the_original(model_cls, target):
+    rng = np.random.default_rng(0)
+    X_old, X_new = rng.normal(size=(300, 3)), rng.normal(size=(100, 3))
+    model = model_cls(n_estimators=20, num_leaves=4, verbose=-1).fit(X_old, target(X_old))
+    before = model.booster_.predict(X_old, raw_score=True)
+
+    updated = train_model.continue_boosting(model, X_new, target(X_new), rounds=5)
+
+    assert updated.booster_.current_iteration() == 25
+    assert model.booster_.current_iteration() == 20
+    np.testing.assert_allclose(model.booster_.predict(X_old, raw_score=True), before)
+    # The first 20 trees are the original ones
+    np.testing.assert_allclose(
+        updated.booster_.predict(X_old, num_iteration=20, raw_score=True), before, atol=1e-9
+    )
+    assert updated.get_params()["num_leaves"] == 4
+
+
+def test_baseline_metrics_follow_the_last_full_training():
+    full = {"mode": "full", "holdout": {"mae": 3.0, "auc": 0.93}}
+    updated = {"mode": "incremental", "holdout": {"mae": 2.9, "auc": 0.94},
+               "baseline_holdout": {"mae": 3.0, "auc": 0.93}}
+    assert train_model.baseline_metrics(full) == {"mae": 3.0, "auc": 0.93}
+    assert train_model.baseline_metrics(updated) == {"mae": 3.0, "auc": 0.93}
+
+
+@pytest.mark.parametrize("metrics, mae_tol, auc_tol, expected", [
+    ({"mae": 3.0, "auc": 0.93}, 0, 0, []),
+    ({"mae": 2.5, "auc": 0.95}, 0, 0, []),
+    ({"mae": 3.0001, "auc": 0.93}, 0, 0, ["mae"]),
+    ({"mae": 3.0, "auc": 0.9299}, 0, 0, ["auc"]),
+    ({"mae": 3.1, "auc": 0.92}, 0, 0, ["mae", "auc"]),
+    ({"mae": 3.04, "auc": 0.929}, 0.05, 0.002, []),
+    ({"mae": 3.06, "auc": 0.927}, 0.05, 0.002, ["mae", "auc"]),
+])
+def test_regressions(metrics, mae_tol, auc_tol, expected):
+    reference = {"mae": 3.0, "auc": 0.93}
+    assert train_model.regressions(metrics, reference, mae_tol, auc_tol) == expected
+
+
+def test_tolerance_cannot_accumulate_across_updates():
+    baseline = {"mae": 3.0, "auc": 0.93}
+    parent = {"mae": 3.04, "auc": 0.93}
+    update = {"mae": 3.08, "auc": 0.93}
+    # Within tolerance of its parent, but beyond it relative to the full training
+    assert train_model.regressions(update, parent, 0.05, 0) == []
+    assert train_model.regressions(update, baseline, 0.05, 0) == ["mae"]
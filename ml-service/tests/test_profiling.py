@@ -0,0 +1,149 @@
+"""On-demand profiling: access control, profile files, rotation and the sampler."""
+import os
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import profiling
+
+TOKEN = "s3cret"
+AUTH = {"X-Profile-Token": TOKEN}
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_MAX_FILES", 3)
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    return tmp_path
+
+
+@pytest.fixture
+def client(profile_dir):
+    app = Flask(__name__)
+
+    @app.route("/fast")
+    def fast():
+        return "ok"
+
+    @app.route("/slow")
+    def slow():
+        end = time.perf_counter() + 0.05
+        while time.perf_counter() < end:
+            pass
+        return "ok"
+
+    assert profiling.init_app(app)
+    return app.test_client()
+
+
+def test_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", None)
+    app = Flask(__name__)
+    assert profiling.init_app(app) is False
+    assert not any(r.rule.startswith("/debug") for r in app.url_map.iter_rules())
+
+
+@pytest.mark.parametrize("token", ["", "wrong", "s3cret-", "é"])
+def test_endpoints_require_the_token(client, token):
+    headers = {"X-Profile-Token": token}
+    assert client.get("/debug/profiles", headers=headers).status_code == 403
+    assert client.post("/debug/profiles/window?seconds=0.1", headers=headers).status_code == 403
+
+    response = client.get("/fast", headers={"X-Profile": "sample", **headers})
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_short_request_still_produces_a_sample_profile(client, profile_dir):
+    response = client.get("/fast", headers={"X-Profile": "sample", **AUTH})
+
+    name = response.headers["X-Profile-Id"]
+    assert name.endswith("-fast.folded")
+    assert (profile_dir / name).stat().st_size > 0
+
+
+def test_sample_profile_contains_the_view(client, profile_dir):
+    response = client.get("/slow", headers={"X-Profile": "sample", **AUTH})
+    folded = (profile_dir / response.headers["X-Profile-Id"]).read_text()
+    assert "slow (test_profiling.py" in folded
+
+
+def test_cprofile_profile_is_listed_and_downloadable(client):
+    name = client.get("/slow", headers={"X-Profile": "cprofile", **AUTH}).headers["X-Profile-Id"]
+    assert name.endswith(".prof")
+
+    listed = client.get("/debug/profiles", headers=AUTH).get_json()["profiles"]
+    assert [p["name"] for p in listed] == [name]
+    download = client.get(f"/debug/profiles/{name}", headers=AUTH)
+    assert download.status_code == 200 and len(download.data) > 0
+
+
+@pytest.mark.parametrize("name", ["notes.txt", "..prof-x", "a b.prof"])
+def test_get_profile_rejects_unexpected_names(client, name):
+    assert client.get(f"/debug/profiles/{name}", headers=AUTH).status_code == 404
+
+
+def test_rotation_keeps_the_newest_profiles(client, profile_dir):
+    names = [
+        client.get("/fast", headers={"X-Profile": "sample", **AUTH}).headers["X-Profile-Id"]
+        for _ in range(5)
+    ]
+    assert sorted(os.listdir(profile_dir)) == sorted(names[-3:])
+
+
+def test_rotation_orders_same_second_files_by_mtime(profile_dir):
+    # Same timestamp prefix; the random part sorts opposite to creation order
+    names = [f"20260101T000000-{tag}-x.folded" for tag in ("ffff", "eeee", "dddd")]
+    for i, name in enumerate(names):
+        path = profile_dir / name
+        path.write_text("a 1\n")
+        os.utime(path, ns=(1_000_000_000 + i, 1_000_000_000 + i))
+
+    profiling._write_folded("20260101T000000-cccc-x.folded", "a 1\n")
+
+    assert sorted(os.listdir(profile_dir)) == sorted(names[1:] + ["20260101T000000-cccc-x.folded"])
+
+
+def test_only_one_sampling_window_at_a_time(client):
+    with profiling._window_lock:
+        response = client.post("/debug/profiles/window?seconds=0.1", headers=AUTH)
+    assert response.status_code == 409
+
+
+def test_window_rejects_a_bad_duration(client):
+    assert client.post("/debug/profiles/window?seconds=abc", headers=AUTH).status_code == 400
+
+
+def test_window_skips_idle_threads_and_the_caller(client, profile_dir):
+    stop = threading.Event()
+
+    def parked_worker():
+        stop.wait()
+
+    def busy_worker():
+        while not stop.is_set():
+            sum(range(1000))
+
+    threads = [threading.Thread(target=parked_worker), threading.Thread(target=busy_worker)]
+    for t in threads:
+        t.start()
+    try:
+        result = client.post("/debug/profiles/window?seconds=0.2", headers=AUTH).get_json()
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+    folded = (profile_dir / result["name"]).read_text()
+    assert result["samples"] > 0
+    assert "busy_worker" in folded
+    assert "parked_worker" not in folded
+    assert "sample_window" not in folded
+
+
+def test_sampler_without_samples_is_empty():
+    sampler = profiling.StackSampler(thread_id=-1).start().stop()
+    assert sampler.folded() == ""
@@ -0,0 +1,25 @@
+"""The vectorized surrogate scorer used for cohorts must match the per-patient one."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from scoring.cohort import FEATURE_NAMES
+from scoring.surrogate import load_surrogate, score_surrogate, score_surrogate_batch, SURROGATE_FILENAME
+from test_cohort import _random_patients
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+def test_batch_scoring_matches_per_patient_scoring():
+    model = load_surrogate(os.path.join(MODELS_DIR, SURROGATE_FILENAME))
+    patients = [
+        {k: int(v) if isinstance(v, bool) else v for k, v in p.items()}
+        for p in _random_patients(500, seed=1)
+    ]
+
+    raw, margins = score_surrogate_batch(model, pd.DataFrame(patients)[FEATURE_NAMES])
+
+    expected = [score_surrogate(model, p) for p in patients]
+    np.testing.assert_allclose(raw, [score for score, _ in expected])
+    assert margins.argmax(axis=1).tolist() == [idx for _, idx in expected]
@@ -5,9 +5,29 @@ Produces:
   - foot_risk_regressor.pkl   (continuous risk score 0-100)
   - foot_risk_classifier.pkl  (3-class: low/moderate/high)
   - shap_explainer.pkl        (SHAP TreeExplainer for feature importance)
+  - foot_risk_surrogate.json  (distilled additive surrogate, also copied to
+                               server/data for the Node fallback)
+  - foot_risk_early_exit.json (stages and calibrated bounds for early-exit inference)
+  - training_manifest.json    (artifact version, rows trained on, holdout metrics)
+
+Every run that updates the boosters also keeps a copy of all artifacts in
+models/versions/v<N>/.
+
+Usage:
+  python train_model.py                 # full training
+  python train_model.py --incremental   # continue boosting on rows appended since the last run
+  python train_model.py --incremental --mae-tolerance 0.05  # allow a small holdout regression
+  python train_model.py --distill-only  # re-distill surrogate from saved boosters
+  python train_model.py --early-exit-only  # re-evaluate truncated/early-exit inference
 """
 import os
 import sys
+import json
+import time
+import timeit
+import shutil
+import argparse
+from datetime import datetime, timezone
 import joblib
 import numpy as np
 import pandas as pd
@@ -24,6 +44,17 @@ import shap
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(SCRIPT_DIR, "synthetic_data.csv")
 MODELS_DIR = os.path.join(SCRIPT_DIR, "..", "models")
+VERSIONS_DIR = os.path.join(MODELS_DIR, "versions")
+MANIFEST_PATH = os.path.join(MODELS_DIR, "training_manifest.json")
+SERVER_DATA_DIR = os.path.join(SCRIPT_DIR, "..", "..", "server", "data")
+
+sys.path.insert(0, os.path.join(SCRIPT_DIR, ".."))
+from scoring.surrogate import (  # noqa: E402
+    SURROGATE_VERSION, SURROGATE_FILENAME, score_surrogate, score_surrogate_batch
+)
+from scoring.early_exit import (  # noqa: E402
+    EARLY_EXIT_FILENAME, StagedBooster, predict_regression, predict_classes
+)
 
 FEATURE_COLS = [
     "hba1c", "crp", "creatinine", "albumin", "esr", "sodium",
@@ -31,9 +62,36 @@ FEATURE_COLS = [
     "has_hypertension", "has_neuropathy", "has_pvd"
 ]
 
+BOOL_COLS = ["has_hypertension", "has_neuropathy", "has_pvd"]
+
 RISK_LEVEL_MAP = {"low": 0, "moderate": 1, "high": 2}
 RISK_LEVEL_NAMES = ["low", "moderate", "high"]
 
+# Surrogate distillation
+SURROGATE_BINS = 32         # per-feature lookup table resolution
+SURROGATE_PAIR_BINS = 8     # per-axis resolution of interaction tables
+SURROGATE_PAIRS = 4         # interaction tables per output
+SURROGATE_SWEEPS = 10       # backfitting passes
+SURROGATE_AUGMENT = 3       # extra column-bootstrapped copies of the train set
+SURROGATE_MAX_ROWS = 5000   # distill on at most this many training rows
+
+# Truncated / early-exit inference
+FAST_TREES_CANDIDATES = [50, 100, 150, 200]
+FAST_TREES_DEFAULT = 150
+EARLY_EXIT_QUANTILE = 0.99
+EARLY_EXIT_TOLERANCES = [1.0, 2.0]   # risk-score points
+TIMING_ROUNDS = 7                   # interleaved timing rounds per setting
+CALIBRATION_MAX_ROWS = 5000         # calibrate empirical bounds on at most this many rows
+
+# Incremental training
+INCREMENTAL_ROUNDS = 50             # boosting rounds added per update
+# Guard tolerances default to 0: an update may not make holdout MAE or AUC
+# worse. A positive tolerance absorbs noise from small updates, and is
+# measured against the last full training as well as the parent version, so
+# repeated updates cannot drift further than one tolerance in total.
+GUARD_MAE_TOLERANCE = 0.0           # max holdout MAE increase (points)
+GUARD_AUC_TOLERANCE = 0.0           # max holdout weighted-AUC decrease
+
 
 def load_data():
     """Load and prepare training data."""
@@ -173,27 +231,394 @@ def build_shap_explainer(model, X_sample):
     return explainer
 
 
-def main():
-    os.makedirs(MODELS_DIR, exist_ok=True)
+def _bin_edges(values, n_bins):
+    """Unique quantile bin edges for a numeric feature (callers give booleans a single 0.5 split)."""
+    quantiles = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])
+    return np.unique(np.round(quantiles, 4)).tolist()
+
+
+def _fill_empty(table, counts):
+    """Give empty bins the value of the nearest populated bin."""
+    filled = np.flatnonzero(counts > 0)
+    if len(filled) == 0:
+        return table
+    nearest = filled[np.abs(np.arange(len(table))[:, None] - filled[None, :]).argmin(axis=1)]
+    return table[nearest]
+
+
+def _backfit(terms, y, n_sweeps=SURROGATE_SWEEPS):
+    """Fit y ~ intercept + sum of lookup tables by backfitting.
+
+    terms: list of (bin index array, table size). Returns (intercept, tables).
+    """
+    intercept = float(y.mean())
+    resid = y - intercept
+    contrib = np.zeros((len(y), len(terms)))
+    tables = [np.zeros(size) for _, size in terms]
+    for _ in range(n_sweeps):
+        for t, (idx, size) in enumerate(terms):
+            r = resid + contrib[:, t]
+            counts = np.bincount(idx, minlength=size)
+            sums = np.bincount(idx, weights=r, minlength=size)
+            table = np.divide(sums, counts, out=np.zeros(size), where=counts > 0)
+            tables[t] = _fill_empty(table, counts)
+            contrib[:, t] = tables[t][idx]
+            resid = r - contrib[:, t]
+    return intercept, tables
+
+
+def _fit_additive_part(y, main_bins, pair_bins, main_sizes, pair_sizes):
+    """Main effects, then the SURROGATE_PAIRS interactions that best explain the residual."""
+    main_terms = [(main_bins[:, j], main_sizes[j]) for j in range(len(FEATURE_COLS))]
+    intercept, tables = _backfit(main_terms, y)
+    resid = y - intercept - sum(tables[j][main_bins[:, j]] for j in range(len(FEATURE_COLS)))
+
+    gains = []
+    for a in range(len(FEATURE_COLS)):
+        for b in range(a + 1, len(FEATURE_COLS)):
+            idx = pair_bins[:, a] * pair_sizes[b] + pair_bins[:, b]
+            size = pair_sizes[a] * pair_sizes[b]
+            counts = np.bincount(idx, minlength=size)
+            sums = np.bincount(idx, weights=resid, minlength=size)
+            gain = np.divide(sums ** 2, counts, out=np.zeros(size), where=counts > 0).sum()
+            gains.append((gain, a, b))
+    pairs = [(a, b) for _, a, b in sorted(gains, reverse=True)[:SURROGATE_PAIRS]]
+
+    pair_terms = [
+        (pair_bins[:, a] * pair_sizes[b] + pair_bins[:, b], pair_sizes[a] * pair_sizes[b])
+        for a, b in pairs
+    ]
+    intercept, tables = _backfit(main_terms + pair_terms, y)
+
+    return {
+        "intercept": round(intercept, 5),
+        "main": {
+            FEATURE_COLS[j]: np.round(tables[j], 5).tolist() for j in range(len(FEATURE_COLS))
+        },
+        "pairs": [
+            {
+                "features": [FEATURE_COLS[a], FEATURE_COLS[b]],
+                "table": np.round(
+                    tables[len(FEATURE_COLS) + k].reshape(pair_sizes[a], pair_sizes[b]), 5
+                ).tolist(),
+            }
+            for k, (a, b) in enumerate(pairs)
+        ],
+    }
+
+
+def bounded_sample(X, max_rows):
+    """X itself, or a fixed random sample of max_rows of its rows."""
+    if len(X) <= max_rows:
+        return X
+    return X.sample(max_rows, random_state=42)
+
+
+def distill_surrogate(regressor, classifier, X_train):
+    """Distill both boosters into a GAM-style additive surrogate (JSON-ready dict).
+
+    The fit targets are the boosters' own outputs (regressor prediction and
+    classifier raw margins) on the training set (at most SURROGATE_MAX_ROWS
+    of it) plus column-bootstrapped copies of it, so the tables also cover
+    feature combinations the training rows leave sparse.
+    """
+    print("\n" + "=" * 60)
+    print("DISTILLING SURROGATE MODEL")
+    print("=" * 60)
 
-    # Load data
-    X, y_score, y_class = load_data()
-    print(f"Dataset: {len(X)} samples, {len(FEATURE_COLS)} features")
+    X_train = bounded_sample(X_train, SURROGATE_MAX_ROWS)
+
+    rng = np.random.default_rng(42)
+    augmented = [X_train]
+    for _ in range(SURROGATE_AUGMENT):
+        augmented.append(pd.DataFrame({
+            col: rng.choice(X_train[col].to_numpy(), size=len(X_train)) for col in FEATURE_COLS
+        }))
+    X_distill = pd.concat(augmented, ignore_index=True)
+
+    edges = {
+        col: [0.5] if col in BOOL_COLS else _bin_edges(X_train[col], SURROGATE_BINS)
+        for col in FEATURE_COLS
+    }
+    pair_edges = {
+        col: [0.5] if col in BOOL_COLS else _bin_edges(X_train[col], SURROGATE_PAIR_BINS)
+        for col in FEATURE_COLS
+    }
+    main_bins = np.column_stack([
+        np.searchsorted(edges[c], X_distill[c].to_numpy(dtype=float), side="right")
+        for c in FEATURE_COLS
+    ])
+    pair_bins = np.column_stack([
+        np.searchsorted(pair_edges[c], X_distill[c].to_numpy(dtype=float), side="right")
+        for c in FEATURE_COLS
+    ])
+    main_sizes = [len(edges[c]) + 1 for c in FEATURE_COLS]
+    pair_sizes = [len(pair_edges[c]) + 1 for c in FEATURE_COLS]
+
+    reg_target = regressor.predict(X_distill)
+    clf_margins = classifier.predict(X_distill, raw_score=True)
+
+    surrogate = {
+        "version": SURROGATE_VERSION,
+        "features": FEATURE_COLS,
+        "edges": edges,
+        "pair_edges": pair_edges,
+        "regressor": _fit_additive_part(reg_target, main_bins, pair_bins, main_sizes, pair_sizes),
+        "classifier": {
+            "classes": RISK_LEVEL_NAMES,
+            "margins": [
+                _fit_additive_part(clf_margins[:, c], main_bins, pair_bins, main_sizes, pair_sizes)
+                for c in range(len(RISK_LEVEL_NAMES))
+            ],
+        },
+    }
+
+    for name, part in [("regressor", surrogate["regressor"])] + [
+        (f"class {RISK_LEVEL_NAMES[c]}", m) for c, m in enumerate(surrogate["classifier"]["margins"])
+    ]:
+        print(f"  {name:>15} interactions: {[' x '.join(p['features']) for p in part['pairs']]}")
+
+    return surrogate
+
+
+def report_surrogate_fidelity(surrogate, regressor, classifier, X_test, ys_test, yc_test):
+    """Compare the surrogate against the LightGBM ensemble and the labels on the holdout set."""
+    print("\n" + "=" * 60)
+    print("SURROGATE FIDELITY (holdout set)")
+    print("=" * 60)
 
-    # Split
-    X_train, X_test, ys_train, ys_test, yc_train, yc_test = train_test_split(
+    raw, margins = score_surrogate_batch(surrogate, X_test)
+    sur_scores = np.clip(np.round(raw), 0, 100)
+    sur_classes = margins.argmax(axis=1)
+    sur_proba = np.exp(margins - margins.max(axis=1, keepdims=True))
+    sur_proba /= sur_proba.sum(axis=1, keepdims=True)
+
+    lgb_scores = np.clip(np.round(regressor.predict(X_test)), 0, 100)
+    lgb_classes = classifier.predict(X_test)
+
+    print(f"  Regressor  MAE vs LightGBM:      {mean_absolute_error(lgb_scores, sur_scores):.2f} points")
+    print(f"  Regressor  MAE vs labels:        {mean_absolute_error(ys_test, sur_scores):.2f} points"
+          f"  (LightGBM: {mean_absolute_error(ys_test, lgb_scores):.2f})")
+    print(f"  Classifier agreement w/ LightGBM: {np.mean(sur_classes == lgb_classes):.4f}")
+    print(f"  Classifier accuracy vs labels:   {np.mean(sur_classes == yc_test):.4f}"
+          f"  (LightGBM: {np.mean(lgb_classes == yc_test):.4f})")
+    try:
+        auc = roc_auc_score(yc_test, sur_proba, multi_class="ovr", average="weighted")
+        print(f"  Weighted AUC:                    {auc:.4f}")
+    except Exception:
+        pass
+
+    rows = X_test.to_dict("records")
+    start = time.perf_counter()
+    for row in rows:
+        score_surrogate(surrogate, row)
+    per_row_us = (time.perf_counter() - start) / len(rows) * 1e6
+    print(f"  Single-row scoring latency:      {per_row_us:.1f} us")
+
+
+def save_surrogate(surrogate):
+    """Write the surrogate artifact and copy it next to the Node fallback."""
+    path = os.path.join(MODELS_DIR, SURROGATE_FILENAME)
+    with open(path, "w") as f:
+        json.dump(surrogate, f, separators=(",", ":"))
+    print(f"  Surrogate:  {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+    if os.path.isdir(SERVER_DATA_DIR):
+        server_path = os.path.join(SERVER_DATA_DIR, SURROGATE_FILENAME)
+        shutil.copyfile(path, server_path)
+        print(f"  Surrogate:  {server_path}")
+    return path
+
+
+def _softmax(margins):
+    p = np.exp(margins - margins.max(axis=1, keepdims=True))
+    return p / p.sum(axis=1, keepdims=True)
+
+
+def _time_settings(settings, X, rows=200):
+    """Best-of-TIMING_ROUNDS batch time (ms) and single-row latency (us) per setting.
+
+    Settings are interleaved within each round, so drift in machine load hits
+    them alike, and each is timed with timeit.repeat keeping the minimum, the
+    run least disturbed by noise.
+    """
+    X_rows = [X[i:i + 1] for i in range(min(rows, len(X)))]
+
+    def one_row_each(fn):
+        for x in X_rows:
+            fn(x)
+
+    for _, fn in settings:  # warm-up
+        fn(X)
+        fn(X_rows[0])
+
+    batch = {name: float("inf") for name, _ in settings}
+    row = {name: float("inf") for name, _ in settings}
+    for _ in range(TIMING_ROUNDS):
+        for name, fn in settings:
+            batch[name] = min(batch[name], *timeit.repeat(lambda: fn(X), number=1, repeat=3))
+            row[name] = min(row[name], *timeit.repeat(lambda: one_row_each(fn), number=1, repeat=1))
+    return (
+        {name: t * 1000 for name, t in batch.items()},
+        {name: t / len(X_rows) * 1e6 for name, t in row.items()},
+    )
+
+
+def calibration_rows(X_train, manifest):
+    """Training rows to calibrate early exit on: those of the last full training.
+
+    Rows appended since then were fitted by the trailing (incremental) trees,
+    whose remaining contribution on them is far larger than on unseen rows;
+    including them would keep the calibrated bounds from ever exiting.
+    """
+    if manifest is None:
+        return X_train
+    return X_train[X_train.index < manifest["holdout_rows"]]
+
+
+def evaluate_early_exit(regressor, classifier, X_calib, X_test, ys_test, yc_test, benchmark=True):
+    """Report accuracy loss and speedup of fast (first-K trees) and early-exit inference.
+
+    Empirical bounds are calibrated on X_calib (at most CALIBRATION_MAX_ROWS
+    of it) and checked on the holdout set; benchmark=False skips the timing
+    runs. Returns the early-exit artifact (stages + bounds) to save.
+    """
+    print("\n" + "=" * 60)
+    print("TRUNCATED / EARLY-EXIT INFERENCE (holdout set)")
+    print("=" * 60)
+
+    X_calib = bounded_sample(X_calib, CALIBRATION_MAX_ROWS)
+    staged_reg = StagedBooster(regressor.booster_)
+    staged_clf = StagedBooster(classifier.booster_)
+    bounds = {
+        "exact": (staged_reg.exact_bounds(), staged_clf.exact_bounds()),
+        "empirical": (
+            staged_reg.calibrate(X_calib, EARLY_EXIT_QUANTILE),
+            staged_clf.calibrate(X_calib, EARLY_EXIT_QUANTILE),
+        ),
+    }
+
+    # All settings call the raw boosters on a NumPy array so timings compare
+    # tree evaluation, not the sklearn wrapper's input validation.
+    reg_booster, clf_booster = regressor.booster_, classifier.booster_
+    X_eval = X_test.to_numpy(dtype=float)
+
+    def full(X):
+        return reg_booster.predict(X), clf_booster.predict(X)
+
+    full_raw, full_proba = full(X_eval)
+    full_scores = np.clip(np.round(full_raw), 0, 100)
+    full_classes = full_proba.argmax(axis=1)
+
+    # "full (control)" times the baseline again: its speedup shows the noise floor
+    settings = [("full", full), ("full (control)", full)]
+    for k in FAST_TREES_CANDIDATES:
+        settings.append((f"fast K={k}", lambda X, k=k: (
+            reg_booster.predict(X, num_iteration=k), clf_booster.predict(X, num_iteration=k)
+        )))
+    for kind in ("exact", "empirical"):
+        for tol in EARLY_EXIT_TOLERANCES:
+            reg_bounds, clf_bounds = bounds[kind]
+            settings.append((f"early {kind} tol={tol:g}", lambda X, rb=reg_bounds, cb=clf_bounds, tol=tol: (
+                predict_regression(staged_reg, rb, X, tol)[0],
+                _softmax(predict_classes(staged_clf, cb, X)[0]),
+            )))
+
+    batch_ms, row_us = _time_settings(settings, X_eval) if benchmark else (None, None)
+
+    print(f"  {'setting':>24} {'MAE':>6} {'dMAE':>6} {'acc':>7} {'agree':>7} {'AUC':>7}"
+          + (f" {'batch x':>8} {'row x':>7}" if benchmark else ""))
+    for name, fn in settings:
+        raw, proba = fn(X_eval)
+        scores = np.clip(np.round(raw), 0, 100)
+        classes = proba.argmax(axis=1)
+        mae = mean_absolute_error(ys_test, scores)
+        d_mae = mean_absolute_error(full_scores, scores)
+        acc = np.mean(classes == yc_test)
+        agree = np.mean(classes == full_classes)
+        auc = roc_auc_score(yc_test, proba, multi_class="ovr", average="weighted")
+        speed = ""
+        if benchmark:
+            speed = f" {batch_ms['full'] / batch_ms[name]:>7.2f}x {row_us['full'] / row_us[name]:>6.2f}x"
+        print(f"  {name:>24} {mae:>6.2f} {d_mae:>6.2f} {acc:>7.4f} {agree:>7.4f} {auc:>7.4f}{speed}")
+
+    for kind in ("exact", "empirical"):
+        reg_bounds, clf_bounds = bounds[kind]
+        _, reg_used = predict_regression(staged_reg, reg_bounds, X_eval, EARLY_EXIT_TOLERANCES[0])
+        _, clf_used = predict_classes(staged_clf, clf_bounds, X_eval)
+        print(f"  Mean trees used ({kind}, tol={EARLY_EXIT_TOLERANCES[0]:g}): "
+              f"regressor {reg_used.mean():.0f}/{staged_reg.n_iter}, "
+              f"classifier {clf_used.mean():.0f}/{staged_clf.n_iter}")
+
+    # reg_used/clf_used are the calibrated (empirical) ones here
+    for name, used, staged in (("regressor", reg_used, staged_reg), ("classifier", clf_used, staged_clf)):
+        if (used == staged.n_iter).all():
+            print(f"  WARNING: calibrated bounds never let the {name} exit early on the holdout "
+                  f"set; early_exit inference gives it no speedup.")
+
+    reg_bounds, clf_bounds = bounds["empirical"]
+    return {
+        "stages": staged_reg.stages[:-1],
+        "quantile": EARLY_EXIT_QUANTILE,
+        "fast_trees": FAST_TREES_DEFAULT,
+        "regressor": {"n_iter": staged_reg.n_iter, "bounds": reg_bounds},
+        "classifier": {"n_iter": staged_clf.n_iter, "bounds": clf_bounds},
+    }
+
+
+def save_early_exit(early_exit):
+    path = os.path.join(MODELS_DIR, EARLY_EXIT_FILENAME)
+    with open(path, "w") as f:
+        json.dump(early_exit, f, separators=(",", ":"))
+    print(f"  Early exit: {path}")
+    return path
+
+
+def split_data(X, y_score, y_class):
+    """Fixed train/holdout split shared by every training mode."""
+    return train_test_split(
         X, y_score, y_class, test_size=0.2, random_state=42, stratify=y_class
     )
-    print(f"Train: {len(X_train)}, Test: {len(X_test)}")
 
-    # Train models
-    regressor = train_regressor(X_train, X_test, ys_train, ys_test)
-    classifier = train_classifier(X_train, X_test, yc_train, yc_test)
 
-    # SHAP explainer (based on regressor for continuous feature contributions)
-    explainer = build_shap_explainer(regressor, X_test)
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
 
-    # Save
+
+def load_split():
+    """Load data with the holdout fixed to the rows of the last full training.
+
+    Rows appended since then (incremental updates) only ever join the
+    training side, so the holdout stays comparable across versions.
+    """
+    X, y_score, y_class = load_data()
+    manifest = load_manifest()
+    base = manifest["holdout_rows"] if manifest else len(X)
+
+    X_train, X_test, ys_train, ys_test, yc_train, yc_test = split_data(
+        X.iloc[:base], y_score[:base], y_class[:base]
+    )
+    X_train = pd.concat([X_train, X.iloc[base:]])
+    ys_train = np.concatenate([ys_train, y_score[base:]])
+    yc_train = np.concatenate([yc_train, y_class[base:]])
+    return X_train, X_test, ys_train, ys_test, yc_train, yc_test
+
+
+def holdout_metrics(regressor, classifier, X_test, ys_test, yc_test):
+    """Holdout MAE (regressor) and weighted one-vs-rest AUC (classifier)."""
+    preds = np.clip(np.round(regressor.predict(X_test)), 0, 100)
+    proba = classifier.predict_proba(X_test)
+    return {
+        "mae": round(float(mean_absolute_error(ys_test, preds)), 4),
+        "auc": round(float(roc_auc_score(yc_test, proba, multi_class="ovr", average="weighted")), 4),
+    }
+
+
+def save_artifacts(regressor, classifier, explainer, surrogate, early_exit, manifest):
+    """Write the live artifacts, the manifest, and a versioned copy of all of them."""
     reg_path = os.path.join(MODELS_DIR, "foot_risk_regressor.pkl")
     clf_path = os.path.join(MODELS_DIR, "foot_risk_classifier.pkl")
     shap_path = os.path.join(MODELS_DIR, "shap_explainer.pkl")
@@ -203,13 +628,220 @@ def main():
     joblib.dump(explainer, shap_path)
 
     print(f"\n{'=' * 60}")
-    print(f"MODELS SAVED")
+    print(f"MODELS SAVED (v{manifest['version']})")
     print(f"{'=' * 60}")
     print(f"  Regressor:  {reg_path}")
     print(f"  Classifier: {clf_path}")
     print(f"  SHAP:       {shap_path}")
+    surrogate_path = save_surrogate(surrogate)
+    early_exit_path = save_early_exit(early_exit)
+
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"  Manifest:   {MANIFEST_PATH}")
+
+    version_dir = os.path.join(VERSIONS_DIR, f"v{manifest['version']}")
+    os.makedirs(version_dir, exist_ok=True)
+    for path in (reg_path, clf_path, shap_path, surrogate_path, early_exit_path, MANIFEST_PATH):
+        shutil.copy2(path, version_dir)
+    print(f"  Versioned:  {version_dir}")
+
+
+def distill_only():
+    """Re-distill the surrogate from the saved boosters without retraining them."""
+    regressor = joblib.load(os.path.join(MODELS_DIR, "foot_risk_regressor.pkl"))
+    classifier = joblib.load(os.path.join(MODELS_DIR, "foot_risk_classifier.pkl"))
+
+    X_train, X_test, ys_train, ys_test, yc_train, yc_test = load_split()
+
+    surrogate = distill_surrogate(regressor, classifier, X_train)
+    report_surrogate_fidelity(surrogate, regressor, classifier, X_test, ys_test, yc_test)
+    save_surrogate(surrogate)
+
+
+def early_exit_only():
+    """Re-evaluate and re-calibrate early-exit inference for the saved boosters."""
+    regressor = joblib.load(os.path.join(MODELS_DIR, "foot_risk_regressor.pkl"))
+    classifier = joblib.load(os.path.join(MODELS_DIR, "foot_risk_classifier.pkl"))
+
+    X_train, X_test, ys_train, ys_test, yc_train, yc_test = load_split()
+
+    X_calib = calibration_rows(X_train, load_manifest())
+    early_exit = evaluate_early_exit(regressor, classifier, X_calib, X_test, ys_test, yc_test)
+    save_early_exit(early_exit)
+
+
+def main():
+    os.makedirs(MODELS_DIR, exist_ok=True)
+
+    # Load data
+    X, y_score, y_class = load_data()
+    print(f"Dataset: {len(X)} samples, {len(FEATURE_COLS)} features")
+
+    # Split
+    X_train, X_test, ys_train, ys_test, yc_train, yc_test = split_data(X, y_score, y_class)
+    print(f"Train: {len(X_train)}, Test: {len(X_test)}")
+
+    # Train models
+    regressor = train_regressor(X_train, X_test, ys_train, ys_test)
+    classifier = train_classifier(X_train, X_test, yc_train, yc_test)
+
+    # SHAP explainer (based on regressor for continuous feature contributions)
+    explainer = build_shap_explainer(regressor, X_test)
+
+    # Compact surrogate for microsecond scoring and the Node fallback
+    surrogate = distill_surrogate(regressor, classifier, X_train)
+    report_surrogate_fidelity(surrogate, regressor, classifier, X_test, ys_test, yc_test)
+
+    # Accuracy/speed trade-off of truncated and early-exit inference
+    early_exit = evaluate_early_exit(regressor, classifier, X_train, X_test, ys_test, yc_test)
+
+    # Save
+    previous = load_manifest()
+    manifest = {
+        "version": previous["version"] + 1 if previous else 1,
+        "mode": "full",
+        "parent_version": None,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "n_rows_trained": len(X),
+        "holdout_rows": len(X),
+        "n_trees": {
+            "regressor": regressor.booster_.current_iteration(),
+            "classifier": classifier.booster_.current_iteration(),
+        },
+        "holdout": holdout_metrics(regressor, classifier, X_test, ys_test, yc_test),
+    }
+    save_artifacts(regressor, classifier, explainer, surrogate, early_exit, manifest)
     print(f"\nDone!")
 
 
+def continue_boosting(model, X_new, y_new, rounds):
+    """Add `rounds` trees to a fitted LightGBM model, trained on the new rows only."""
+    params = model.get_params()
+    params["n_estimators"] = rounds
+    updated = type(model)(**params)
+    updated.fit(X_new, y_new, init_model=model.booster_)
+    return updated
+
+
+def baseline_metrics(manifest):
+    """Holdout metrics of the last full training in this manifest's lineage."""
+    if manifest["mode"] == "full":
+        return manifest["holdout"]
+    return manifest["baseline_holdout"]
+
+
+def regressions(metrics, reference, mae_tolerance, auc_tolerance):
+    """Names of the metrics worse than reference by more than the tolerance."""
+    failed = []
+    if metrics["mae"] > reference["mae"] + mae_tolerance:
+        failed.append("mae")
+    if metrics["auc"] < reference["auc"] - auc_tolerance:
+        failed.append("auc")
+    return failed
+
+
+def incremental(rounds=INCREMENTAL_ROUNDS, mae_tolerance=GUARD_MAE_TOLERANCE,
+                auc_tolerance=GUARD_AUC_TOLERANCE):
+    """Continue boosting the saved models on rows appended since the last run.
+
+    No SMOTE and no retraining from scratch: boosting cost scales with the
+    new rows, and the derived artifacts (surrogate, early-exit bounds) are
+    rebuilt on bounded samples without the speed benchmark. The update is refused (exit code 1, nothing written) if holdout MAE or
+    AUC is worse, beyond the tolerances, than the parent version's or the
+    last full training's.
+    """
+    run_start = time.perf_counter()
+    manifest = load_manifest()
+    if manifest is None:
+        print(f"No training manifest at {MANIFEST_PATH}; run a full training first.")
+        sys.exit(1)
+
+    X, y_score, y_class = load_data()
+    n_trained = manifest["n_rows_trained"]
+    X_new, ys_new, yc_new = X.iloc[n_trained:], y_score[n_trained:], y_class[n_trained:]
+    print(f"Dataset: {len(X)} samples, {len(X_new)} new since v{manifest['version']}")
+    if len(X_new) == 0:
+        print("Nothing to do.")
+        return
+    if len(np.unique(yc_new)) < len(RISK_LEVEL_NAMES):
+        print("UPDATE REFUSED: new rows must contain every risk level to continue the classifier.")
+        sys.exit(1)
+
+    X_train, X_test, ys_train, ys_test, yc_train, yc_test = load_split()
+    regressor = joblib.load(os.path.join(MODELS_DIR, "foot_risk_regressor.pkl"))
+    classifier = joblib.load(os.path.join(MODELS_DIR, "foot_risk_classifier.pkl"))
+
+    print("\n" + "=" * 60)
+    print(f"INCREMENTAL UPDATE (+{rounds} rounds on {len(X_new)} rows)")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    new_regressor = continue_boosting(regressor, X_new, ys_new, rounds)
+    new_classifier = continue_boosting(classifier, X_new, yc_new, rounds)
+    elapsed = time.perf_counter() - start
+
+    before = holdout_metrics(regressor, classifier, X_test, ys_test, yc_test)
+    after = holdout_metrics(new_regressor, new_classifier, X_test, ys_test, yc_test)
+    baseline = baseline_metrics(manifest)
+    print(f"  Boosting time: {elapsed:.2f} s")
+    print(f"  Holdout MAE:   {before['mae']:.4f} -> {after['mae']:.4f} (last full training {baseline['mae']:.4f})")
+    print(f"  Holdout AUC:   {before['auc']:.4f} -> {after['auc']:.4f} (last full training {baseline['auc']:.4f})")
+
+    for label, reference in (("parent version", before), ("last full training", baseline)):
+        failed = regressions(after, reference, mae_tolerance, auc_tolerance)
+        if failed:
+            print(f"\nUPDATE REFUSED: holdout {', '.join(failed).upper()} regressed vs the {label}; "
+                  "current models kept.")
+            sys.exit(1)
+
+    explainer = build_shap_explainer(new_regressor, X_test)
+    surrogate = distill_surrogate(new_regressor, new_classifier, X_train)
+    report_surrogate_fidelity(surrogate, new_regressor, new_classifier, X_test, ys_test, yc_test)
+    early_exit = evaluate_early_exit(
+        new_regressor, new_classifier, calibration_rows(X_train, manifest), X_test, ys_test, yc_test,
+        benchmark=False,
+    )
+    print(f"  NOTE: 'fast' inference evaluates only the first {early_exit['fast_trees']} trees, so it "
+          "ignores every tree added by incremental updates; run a full training to include them.")
+
+    save_artifacts(new_regressor, new_classifier, explainer, surrogate, early_exit, {
+        "version": manifest["version"] + 1,
+        "mode": "incremental",
+        "parent_version": manifest["version"],
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "n_rows_trained": len(X),
+        "holdout_rows": manifest["holdout_rows"],
+        "n_trees": {
+            "regressor": new_regressor.booster_.current_iteration(),
+            "classifier": new_classifier.booster_.current_iteration(),
+        },
+        "holdout": after,
+        "baseline_holdout": baseline,
+    })
+    print(f"\nDone in {time.perf_counter() - run_start:.1f} s (boosting {elapsed:.2f} s)")
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--incremental", action="store_true",
+                        help="continue boosting the saved models on newly appended rows")
+    parser.add_argument("--rounds", type=int, default=INCREMENTAL_ROUNDS,
+                        help="boosting rounds to add in incremental mode")
+    parser.add_argument("--mae-tolerance", type=float, default=GUARD_MAE_TOLERANCE,
+                        help="holdout MAE increase allowed in incremental mode (default: none)")
+    parser.add_argument("--auc-tolerance", type=float, default=GUARD_AUC_TOLERANCE,
+                        help="holdout AUC decrease allowed in incremental mode (default: none)")
+    parser.add_argument("--distill-only", action="store_true",
+                        help="re-distill the surrogate from the saved boosters")
+    parser.add_argument("--early-exit-only", action="store_true",
+                        help="re-evaluate early-exit inference for the saved boosters")
+    args = parser.parse_args()
+    if args.incremental:
+        incremental(args.rounds, args.mae_tolerance, args.auc_tolerance)
+    elif args.distill_only:
+        distill_only()
+    elif args.early_exit_only:
+        early_exit_only()
+    else:
+        main()
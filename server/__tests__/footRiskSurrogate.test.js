@@ -0,0 +1,82 @@
+/**
+ * Unit tests for the foot risk surrogate fallback (distilled LightGBM tables).
+ * No network: FOOT_RISK_SERVICE_URL is unset, so predict() scores locally.
+ */
+
+jest.mock('../config/firebaseConfig', () => ({ db: null }));
+
+const footRisk = require('../services/footRiskService');
+
+const PANEL = {
+    hba1c: 8, crp: 3, creatinine: 1.2, albumin: 3.4, esr: 22, sodium: 138,
+    age: 60, diabetes_duration_years: 12,
+    has_hypertension: false, has_neuropathy: true, has_pvd: false,
+};
+
+// Tiny hand-built artifact: score = 10 + hba1c table + (neuropathy x hba1c) pair
+const TOY_MODEL = {
+    version: 'surrogate_v1',
+    features: ['hba1c', 'has_neuropathy'],
+    edges: { hba1c: [7, 9], has_neuropathy: [0.5] },
+    pair_edges: { hba1c: [7.5], has_neuropathy: [0.5] },
+    regressor: {
+        intercept: 10,
+        main: { hba1c: [0, 20, 40], has_neuropathy: [0, 5] },
+        pairs: [{ features: ['hba1c', 'has_neuropathy'], table: [[0, 0], [0, 15]] }],
+    },
+    classifier: {
+        classes: ['low', 'moderate', 'high'],
+        margins: [
+            { intercept: 1, main: { hba1c: [1, 0, -1] }, pairs: [] },
+            { intercept: 0, main: { hba1c: [0, 1.5, 0] }, pairs: [] },
+            { intercept: -1, main: { hba1c: [-1, 0, 3] }, pairs: [] },
+        ],
+    },
+};
+
+describe('footRiskService — surrogate fallback', () => {
+    test('bins with bisect-right semantics and sums main + pair tables', () => {
+        const result = footRisk.surrogateFallback(TOY_MODEL, { ...PANEL, hba1c: 9 });
+        // hba1c 9 -> main bin 2 (40), neuropathy -> 5, pair bin [1][1] -> 15
+        expect(result.risk_score).toBe(70);
+        expect(result.risk_level).toBe('high');
+        expect(result.fallback).toBe(true);
+        expect(result.model_version).toBe('surrogate_v1_fallback');
+    });
+
+    test('picks the arg-max class', () => {
+        const result = footRisk.surrogateFallback(TOY_MODEL, { ...PANEL, hba1c: 7.2, has_neuropathy: false });
+        expect(result.risk_score).toBe(30);
+        expect(result.risk_level).toBe('moderate');
+    });
+
+    test('clamps the score to 0-100', () => {
+        const withIntercept = intercept => ({ ...TOY_MODEL, regressor: { ...TOY_MODEL.regressor, intercept } });
+        // 50 + 40 + 5 + 15 = 110
+        expect(footRisk.surrogateFallback(withIntercept(50), { ...PANEL, hba1c: 9 }).risk_score).toBe(100);
+        // -80 + 0 + 0 = -80
+        expect(footRisk.surrogateFallback(withIntercept(-80), { ...PANEL, hba1c: 5, has_neuropathy: false }).risk_score).toBe(0);
+    });
+
+    test('recommendations follow the same rules as the rule-based fallback', () => {
+        const surrogate = footRisk.surrogateFallback(TOY_MODEL, { ...PANEL, hba1c: 5 }, 'sw');
+        const ruleBased = footRisk.ruleBasedFallback({ ...PANEL, hba1c: 5 }, 'sw');
+        // Both include the biomarker-driven recommendations and end with hygiene
+        expect(surrogate.recommendations.slice(-1)).toEqual(ruleBased.recommendations.slice(-1));
+        expect(surrogate.recommendations).toContain('Ufuatiliaji wa CRP - uvimbe umegunduliwa');
+    });
+
+    test('shipped artifact loads and scores a panel within range', () => {
+        const model = footRisk.loadSurrogate();
+        expect(model).not.toBeNull();
+        const result = footRisk.surrogateFallback(model, PANEL);
+        expect(result.risk_score).toBeGreaterThanOrEqual(0);
+        expect(result.risk_score).toBeLessThanOrEqual(100);
+        expect(['low', 'moderate', 'high']).toContain(result.risk_level);
+    });
+
+    test('predict() uses the surrogate when the ml-service is not configured', async () => {
+        const result = await footRisk.predict(PANEL, 'fr');
+        expect(result.model_version).toBe('surrogate_v1_fallback');
+    });
+});
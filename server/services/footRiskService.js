@@ -1,7 +1,22 @@
+const fs = require('fs');
+const path = require('path');
 const axios = require('axios');
 const { db } = require('../config/firebaseConfig');
 
 const CLOUD_RUN_URL = process.env.FOOT_RISK_SERVICE_URL;
+const CLOUD_RUN_TIMEOUT_MS = 10000;
+// Budget advertised to the ml-service, leaving headroom for network transfer
+const CLOUD_RUN_DEADLINE_MS = 9000;
+
+// Distilled surrogate of the LightGBM models (ml-service/training/train_model.py)
+const SURROGATE_PATH = process.env.FOOT_RISK_SURROGATE_PATH
+    || path.join(__dirname, '../data/foot_risk_surrogate.json');
+const SURROGATE_FEATURES = [
+    'hba1c', 'crp', 'creatinine', 'albumin', 'esr', 'sodium',
+    'age', 'diabetes_duration_years',
+    'has_hypertension', 'has_neuropathy', 'has_pvd'
+];
+const RISK_LEVEL_NAMES = ['low', 'moderate', 'high'];
 
 // --- Multilingual translations for recommendations and risk labels ---
 const RISK_LABELS = {
@@ -85,8 +100,11 @@ const predict = async (biomarkers, lang = 'fr') => {
     if (CLOUD_RUN_URL) {
         try {
             const response = await axios.post(`${CLOUD_RUN_URL}/predict`, { ...biomarkers, lang }, {
-                timeout: 10000,
-                headers: { 'Content-Type': 'application/json' }
+                timeout: CLOUD_RUN_TIMEOUT_MS,
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-Deadline-Ms': String(CLOUD_RUN_DEADLINE_MS)
+                }
             });
             return response.data;
         } catch (error) {
@@ -94,10 +112,89 @@ const predict = async (biomarkers, lang = 'fr') => {
         }
     }
 
-    // Fallback: local rule-based scoring
+    // Fallback: local surrogate model if available, else rule-based scoring
+    const surrogate = loadSurrogate();
+    if (surrogate) return surrogateFallback(surrogate, biomarkers, lang);
     return ruleBasedFallback(biomarkers, lang);
 };
 
+let surrogateCache;
+
+/**
+ * Load the surrogate artifact once; null if missing or unreadable.
+ */
+function loadSurrogate() {
+    if (surrogateCache !== undefined) return surrogateCache;
+    try {
+        surrogateCache = JSON.parse(fs.readFileSync(SURROGATE_PATH, 'utf8'));
+    } catch (error) {
+        if (error.code !== 'ENOENT') {
+            console.warn('Foot risk surrogate could not be loaded:', error.message);
+        }
+        surrogateCache = null;
+    }
+    return surrogateCache;
+}
+
+/**
+ * Index of the bin holding x (same as Python's bisect_right).
+ */
+function binIndex(edges, x) {
+    let lo = 0;
+    let hi = edges.length;
+    while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (x < edges[mid]) hi = mid;
+        else lo = mid + 1;
+    }
+    return lo;
+}
+
+function additiveScore(part, bins, pairBins) {
+    let total = part.intercept;
+    for (const [feature, table] of Object.entries(part.main)) {
+        total += table[bins[feature]];
+    }
+    for (const pair of part.pairs) {
+        const [a, b] = pair.features;
+        total += pair.table[pairBins[a]][pairBins[b]];
+    }
+    return total;
+}
+
+/**
+ * Score with the distilled surrogate (mirrors ml-service/scoring/surrogate.py)
+ */
+function surrogateFallback(model, data, lang = 'fr') {
+    const features = {};
+    for (const f of SURROGATE_FEATURES) {
+        features[f] = f.startsWith('has_') ? (data[f] ? 1 : 0) : parseFloat(data[f]) || 0;
+    }
+
+    const bins = {};
+    for (const f of model.features) bins[f] = binIndex(model.edges[f], features[f]);
+    const pairBins = {};
+    for (const [f, edges] of Object.entries(model.pair_edges)) pairBins[f] = binIndex(edges, features[f]);
+
+    const rawScore = additiveScore(model.regressor, bins, pairBins);
+    const margins = model.classifier.margins.map(m => additiveScore(m, bins, pairBins));
+    const classIdx = margins.indexOf(Math.max(...margins));
+
+    const score = Math.min(Math.max(Math.round(rawScore), 0), 100);
+    const risk_level = RISK_LEVEL_NAMES[classIdx];
+    const labels = RISK_LABELS[lang] || RISK_LABELS.fr;
+
+    return {
+        risk_score: score,
+        risk_level,
+        risk_label: labels[risk_level],
+        shap_values: null,
+        recommendations: buildRecommendations(features, score, lang),
+        model_version: `${model.version}_fallback`,
+        fallback: true
+    };
+}
+
 /**
  * Local rule-based scoring (mirrors ml-service/scoring/rule_based.py)
  */
@@ -160,7 +257,6 @@ function ruleBasedFallback(data, lang = 'fr') {
     score = Math.min(Math.max(Math.round(score), 0), 100);
 
     const labels = RISK_LABELS[lang] || RISK_LABELS.fr;
-    const r = RECS[lang] || RECS.fr;
 
     let risk_level;
     if (score <= 30) risk_level = 'low';
@@ -168,17 +264,11 @@ function ruleBasedFallback(data, lang = 'fr') {
     else risk_level = 'high';
     const risk_label = labels[risk_level];
 
-    const recommendations = [];
-    if (score > 60) recommendations.push(r.urgentPodo);
-    if (score > 30) recommendations.push(r.footExam);
-    if (hba1c >= 7.5) recommendations.push(r.hba1c);
-    if (crp >= 3) recommendations.push(r.crp);
-    if (creatinine >= 1.3) recommendations.push(r.kidney);
-    if (albumin < 3.5) recommendations.push(r.nutrition);
-    if (esr >= 20) recommendations.push(r.esr);
-    if (data.has_neuropathy) recommendations.push(r.neuropathy);
-    if (data.has_pvd) recommendations.push(r.pvd);
-    recommendations.push(r.hygiene);
+    const recommendations = buildRecommendations(
+        { hba1c, crp, creatinine, albumin, esr, has_neuropathy: data.has_neuropathy, has_pvd: data.has_pvd },
+        score,
+        lang
+    );
 
     return {
         risk_score: score,
@@ -191,6 +281,25 @@ function ruleBasedFallback(data, lang = 'fr') {
     };
 }
 
+/**
+ * Clinical recommendations (mirrors _generate_recommendations in rule_based.py)
+ */
+function buildRecommendations(data, score, lang = 'fr') {
+    const r = RECS[lang] || RECS.fr;
+    const recommendations = [];
+    if (score > 60) recommendations.push(r.urgentPodo);
+    if (score > 30) recommendations.push(r.footExam);
+    if (data.hba1c >= 7.5) recommendations.push(r.hba1c);
+    if (data.crp >= 3) recommendations.push(r.crp);
+    if (data.creatinine >= 1.3) recommendations.push(r.kidney);
+    if (data.albumin < 3.5) recommendations.push(r.nutrition);
+    if (data.esr >= 20) recommendations.push(r.esr);
+    if (data.has_neuropathy) recommendations.push(r.neuropathy);
+    if (data.has_pvd) recommendations.push(r.pvd);
+    recommendations.push(r.hygiene);
+    return recommendations;
+}
+
 /**
  * Save assessment to Firestore subcollection
  */
@@ -353,4 +462,7 @@ IMPORTANT: Respond STRICTLY in valid JSON without markdown formatting.
     }
 };
 
-module.exports = { predict, saveAssessment, getAssessmentHistory, analyzeWoundImages };
+module.exports = {
+    predict, saveAssessment, getAssessmentHistory, analyzeWoundImages,
+    loadSurrogate, surrogateFallback, ruleBasedFallback
+};